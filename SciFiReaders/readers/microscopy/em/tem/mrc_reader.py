@@ -17,7 +17,7 @@ import h5py
 import sys
 import numpy as np
 import dask.array as da
-from numba import njit
+from numba import njit, prange
 import sidpy
 import mrcfile
 try:
@@ -30,6 +30,10 @@ __all__ = ["MRCReader", "version"]
 
 version = '1.0'
 
+# extended header fields holding the scan extent and the camera pixel size
+SCAN_SIZE_LABELS = ['Scan size right', 'Scan size left', 'Scan size top', 'Scan size bottom']
+PIXEL_SIZE_LABELS = ['Pixel size X', 'Pixel size Y']
+
 
 class MRCReader(sidpy.Reader):
 
@@ -39,36 +43,43 @@ class MRCReader(sidpy.Reader):
         self.metadata = None
         self.data = None
         self.scan_shape = None
+        self._mrc_file = None
 
         self.dataset = None
+        self._dataset_is_lazy = False
 
             
-    def read(self, handedness='right', scan_pixel_size=None):
+    def read(self, handedness='right', scan_pixel_size=None, lazy=False):
         # scan pixel size needs to be in meters, if you know it
         # handedness is either 'right' or 'left', and determines the handedness of the scan
         # not all .mrc files have the handedness embedded, so if your file looks wrong, try changing this
+        # lazy=True skips the extended header entirely (for a quick look at the data): the scan is assumed
+        # to be square and the camera axes are left in pixels. Call read_metadata() to fill in the metadata later
 
         # read with 
+        # the memory map has to stay open for as long as the dask array reads from it.
+        # A map left open by a previous read() is closed first (its datasets keep their own reference to the data)
+        self.close()
+        self.dataset = None
+        self.metadata = None
         mrc =  mrcfile.mmap(self.file_path, permissive=True)
+        self._mrc_file = mrc
 
         # data
         mrc_data = mrc.data
 
-        # metadata
-        extended_header = mrc.indexed_extended_header
-        metadata_labels = extended_header.dtype.names
-        metadata_labels = [label for label in metadata_labels]
-
-        # Reshape the data
-        scan_shape_params = ['Scan size right', 'Scan size left', 'Scan size top', 'Scan size bottom']
+        if lazy:
+            metadata = {}
+            x_shape = y_shape = int(round(np.sqrt(mrc_data.shape[0])))
+            if x_shape * y_shape != mrc_data.shape[0]:
+                raise ValueError(f'lazy reading needs a square scan, but there are {mrc_data.shape[0]} frames')
+        else:
+            metadata = self.read_metadata()
 
-        sizes = []
-        for label in scan_shape_params:
-            size = np.unique(extended_header[label])
-            sizes.append(size)
-        sizes = np.array(sizes).flatten()
-        y_shape = int(np.abs(sizes[0] - sizes[1]))
-        x_shape = int(np.abs(sizes[2] - sizes[3]))
+            # Reshape the data
+            sizes = np.array([metadata[label] for label in SCAN_SIZE_LABELS]).flatten()
+            y_shape = int(np.abs(sizes[0] - sizes[1]))
+            x_shape = int(np.abs(sizes[2] - sizes[3]))
 
         if handedness=='right':
             reshape_target = (x_shape, y_shape, mrc_data.shape[-2], mrc_data.shape[-1])
@@ -78,20 +89,35 @@ class MRCReader(sidpy.Reader):
             print('Handedness must = "right" or "left"')
 
         try:
-            self.data = np.reshape(mrc_data, reshape_target)
+            data = np.reshape(mrc_data, reshape_target)
         except ValueError:
+            num_positions = reshape_target[0] * reshape_target[1]
+            if mrc_data.shape[0] > num_positions:
+                raise ValueError(f'Error reshaping data: {mrc_data.shape} to {reshape_target}')
             print(f'Error reshaping data: {mrc_data.shape} to {reshape_target}')
-            print(f'the scan must have been stopped early, on the microscope - this creates issues still')
-            print(f'sorry, we do not support reading point cloud versions of this data yet')
+            print(f'the scan must have been stopped early, on the microscope - '
+                  f'the missing {num_positions - mrc_data.shape[0]} frames are filled with zeros')
+            # frames are recorded in raster order, so frame k sits at divmod(k, scan width)
+            data = np.zeros(reshape_target, dtype=mrc_data.dtype)
+            x_index, y_index = np.divmod(np.arange(mrc_data.shape[0]), reshape_target[1])
+            _scatter_frames(data, np.asarray(mrc_data), x_index, y_index)
+
+        # wrap in dask without a copy, so memory-mapped frames are only read from disk when accessed.
+        # Whole frames per chunk, with as many scan positions as fit dask's array.chunk-size (~128 MiB):
+        # single-frame chunks make far too many tasks for large scans
+        self.data = da.from_array(_FrameSource(data), chunks=('auto', 'auto', -1, -1),
+                                  name=False, asarray=False, fancy=False)
 
 
         # These 'pixel sizes' are usually in the order of 10^8: This the camera pixel size, not the scan step size.
         # I've talked to thermofisher and plan to update this eventually (2024-9-6)
-        camera_pixel_sizes = []
-        for label in ['Pixel size X', 'Pixel size Y']:
-            size = np.unique(extended_header[label])
-            size *= 1e-10 # conversion from 1/m to 1/Angstrom
-            camera_pixel_sizes.append(size)
+        if lazy:
+            camera_pixel_sizes = [1, 1]
+            camera_size_units = 'pixels'
+        else:
+            # conversion from 1/m to 1/Angstrom
+            camera_pixel_sizes = [metadata[label] * 1e-10 for label in PIXEL_SIZE_LABELS]
+            camera_size_units = '1/Å'
 
         # scan pixel size
         if scan_pixel_size:
@@ -103,35 +129,103 @@ class MRCReader(sidpy.Reader):
             self.scan_size_units = 'pixels'
 
 
-        # make metadata dictionary
-        metadata = {}
-        for label in metadata_labels:
-            # later, we may want to remove 'np.unique()', but I see no problems now
-            metadata[label] = np.unique(extended_header[label])
-        self.metadata = metadata
-
-
         # create sidpy Dataset
-        dataset = sidpy.Dataset.from_array(self.data, name='MRC_000', chunks=(1, 1, reshape_target[-2], reshape_target[-1]))
+        dataset = sidpy.Dataset.from_array(self.data, name='MRC_000')
         # add metadata dictionary
-        dataset.original_metadata = self.metadata
+        dataset.original_metadata = metadata
         dataset.data_type = 'image_4d'
 
-        dataset.set_dimension(0, sidpy.Dimension(np.arange(dataset.shape[0]) * self.scan_pixel_size, 
+        dataset.set_dimension(0, sidpy.Dimension(_scaled_axis(dataset.shape[0], self.scan_pixel_size),
                                                 name='x', units=self.scan_size_units, quantity='length',
                                                 dimension_type='spatial'))
 
-        dataset.set_dimension(1, sidpy.Dimension(np.arange(dataset.shape[1]) * self.scan_pixel_size,
+        dataset.set_dimension(1, sidpy.Dimension(_scaled_axis(dataset.shape[1], self.scan_pixel_size),
                                                 name='y', units=self.scan_size_units, quantity='length',
                                                 dimension_type='spatial'))
 
-        dataset.set_dimension(2, sidpy.Dimension(np.arange(dataset.shape[2]) * camera_pixel_sizes[0],
-                                                name='u', units='1/Å', quantity='angle',
+        dataset.set_dimension(2, sidpy.Dimension(_scaled_axis(dataset.shape[2], camera_pixel_sizes[0]),
+                                                name='u', units=camera_size_units, quantity='angle',
                                                 dimension_type='reciprocal'))
 
-        dataset.set_dimension(3, sidpy.Dimension(np.arange(dataset.shape[3]) * camera_pixel_sizes[1],
-                                                name='v', units='1/Å', quantity='angle',
+        dataset.set_dimension(3, sidpy.Dimension(_scaled_axis(dataset.shape[3], camera_pixel_sizes[1]),
+                                                name='v', units=camera_size_units, quantity='angle',
                                                 dimension_type='reciprocal'))
 
+        self.dataset = dataset
+        self._dataset_is_lazy = lazy
         return {'Channel_000': dataset}
-    
+
+    def read_metadata(self):
+        """
+        Reads the per-frame metadata from the extended header, keeping the unique values of every field
+
+        This is done by read(), unless it was called with lazy=True.
+        After a lazy read(), the metadata is also added to the dataset returned by that (latest) read().
+
+        Returns
+        -------
+        metadata : dict
+            Unique values of each extended header field
+        """
+        if self._mrc_file is None:
+            self._mrc_file = mrcfile.mmap(self.file_path, permissive=True)
+
+        # one sequential read of the (small) extended header, instead of strided reads through the mmap per field
+        extended_header = np.array(self._mrc_file.indexed_extended_header)
+        metadata_labels = list(extended_header.dtype.names)
+
+        # make metadata dictionary in a single pass over the extended header
+        metadata = {}
+        for label in metadata_labels:
+            metadata[label] = _unique_values(extended_header[label])
+        self.metadata = metadata
+
+        if self.dataset is not None and self._dataset_is_lazy:
+            self.dataset.original_metadata = metadata
+        return metadata
+
+    def close(self):
+        if self._mrc_file is not None:
+            self._mrc_file.close()
+            self._mrc_file = None
+
+
+class _FrameSource:
+    """
+    Array-like wrapper handed to dask.array.from_array, which would otherwise copy (i.e. fully read)
+    a memory-mapped array. Every chunk is read into its own memory, so it stays valid after close()
+    """
+    def __init__(self, array):
+        self._array = array
+        self.shape = array.shape
+        self.dtype = array.dtype
+        self.ndim = array.ndim
+
+    def __getitem__(self, key):
+        return np.array(self._array[key])
+
+
+def _unique_values(column):
+    # same result as np.unique, but a constant column (the usual case) only costs a min/max reduction
+    if column.size:
+        if column.dtype.kind in 'iuf':
+            is_constant = column.max() == column.min()
+        else:
+            is_constant = (column == column[0]).all()
+        if is_constant:
+            return column[:1].copy()
+    return np.unique(column)
+
+
+def _scaled_axis(length, step):
+    # step * [0, 1, ..., length - 1] as float64 (which sidpy.Dimension stores anyway) in one allocation
+    axis = np.arange(length, dtype=np.float64)
+    axis *= step
+    return axis
+
+
+@njit(parallel=True, cache=True)
+def _scatter_frames(out, frames, x_index, y_index):
+    # copies each recorded frame to its scan position, in parallel over frames
+    for frame in prange(frames.shape[0]):
+        out[x_index[frame], y_index[frame]] = frames[frame]
@@ -9,6 +9,7 @@ Updated on Fri Sep 11 15:22:00 2020 for ScopeReader
 
 import sys
 import numpy as np  # For array operations
+import dask.array as da
 import sidpy as sid
 from sidpy.sid import Reader
 import re
@@ -22,6 +23,136 @@ except ModuleNotFoundError:
     (pip install igor2) before attempting.")
     bw = None
 
+# spectroscopy axis line of Matrix CITS notes, e.g. "... start = -1.5, end = 2.0, points per curve = 11, ..."
+_BIAS_RANGE_RE = re.compile(r'start\s*=\s*([-+\d.eE]+).*?end\s*=\s*([-+\d.eE]+)')
+_CURVE_POINTS_RE = re.compile(r'curve\s*=\s*(\d+)')
+# a whole '\r'-separated note line that contains at least one ':' or '='
+_PARM_LINE_RE = re.compile(r'(?:^|(?<=\r))[^\r:=]*[:=][^\r]*')
+
+
+def _decode_note(ibw_wave, codec='utf-8'):
+    """
+    Returns the note of the wave as a string, without trailing carriage returns
+
+    Parameters
+    ----------
+    ibw_wave : dictionary
+        Wave entry in the dictionary obtained from loading the ibw file
+    codec : str, optional
+        Codec to be used to decode the bytestrings into Python strings if needed.
+        Default 'utf-8'
+
+    Returns
+    -------
+    parm_string : str
+        Note with one parameter per '\\r'-separated line
+    """
+    parm_string = ibw_wave.get('note')
+    if type(parm_string) == bytes:
+        try:
+            parm_string = parm_string.decode(codec)
+        except:
+            parm_string = parm_string.decode('ISO-8859-1')  # for older AR software
+    return parm_string.rstrip('\r')
+
+
+def _parse_parm_line(pair_string, parm_dict):
+    """
+    Adds the key-value pair(s) held by one line of the note to parm_dict.
+    Numeric values are stored as int or float, everything else (including 'NaN') as str
+
+    Parameters
+    ----------
+    pair_string : str
+        One line of the note
+    parm_dict : dictionary
+        Dictionary the parameters are written into
+    """
+    for split_parm in (':', '='):
+        # only lines with exactly one separator hold a key-value pair
+        if pair_string.count(split_parm) != 1:
+            continue
+        key, _, value = pair_string.partition(split_parm)
+        key, value = key.strip(), value.strip()
+        try:
+            num = float(value)
+        except ValueError:
+            parm_dict[key] = value
+        else:
+            if num != num:  # NaN stays text, as it always has been
+                parm_dict[key] = value
+            else:
+                parm_dict[key] = int(num) if num.is_integer() else num
+
+
+def _read_wave_header(ibw_wave, parm_dict):
+    """
+    Copies the creation and modification times (and wave name) from the wave header to parm_dict
+
+    Parameters
+    ----------
+    ibw_wave : dictionary
+        Wave entry in the dictionary obtained from loading the ibw file
+    parm_dict : dictionary
+        Dictionary the parameters are written into
+
+    Returns
+    -------
+    other_parms : dictionary
+        The complete wave header
+    """
+    other_parms = ibw_wave.get('wave_header')
+    for key in ['creationDate', 'modDate', 'bname']:
+        try:
+            parm_dict[key] = other_parms[key]
+        except KeyError:
+            pass
+    return other_parms
+
+
+def _get_chan_labels(ibw_wave, codec='utf-8'):
+    """
+    Retrieves the names of the data channels and default units
+
+    Parameters
+    ----------
+    ibw_wave : dictionary
+        Wave entry in the dictionary obtained from loading the ibw file
+    codec : str, optional
+        Codec to be used to decode the bytestrings into Python strings if needed.
+        Default 'utf-8'
+
+    Returns
+    -------
+    labels : list of strings
+        List of the names of the data channels
+    default_units : list of strings
+        List of units for the measurement in each channel
+    """
+    temp = ibw_wave.get('labels')
+    # drop empty (str) labels and decode the rest in one pass.
+    # Empty bytes labels are kept: the layer 0 null label of older AR software is sliced off by the reader
+    labels = [chan.decode(codec) if type(chan) == bytes else chan
+              for item in temp for chan in item if chan != '']
+
+    default_units = list()
+    for chan_ind, chan in enumerate(labels):
+        # clean up channel names
+        if chan.lower().rfind('trace') > 0:
+            labels[chan_ind] = chan[:chan.lower().rfind('trace') + 5]
+        else:
+            labels[chan_ind] = chan
+        # Figure out (default) units
+        if chan.startswith('Phase'):
+            default_units.append('deg')
+        elif chan.startswith('Current'):
+            default_units.append('A')
+        else:
+            default_units.append('m')
+
+    return labels, default_units
+
+
 class IgorMatrixReader(Reader):
     """
     Extracts data and metadata from Igor Binary Wave (.ibw) files exported from MatrixFiles
@@ -35,7 +166,7 @@ class IgorMatrixReader(Reader):
 
         super().__init__(file_path, *args, **kwargs)
 
-    def read(self, verbose=False, parm_encoding='utf-8'):
+    def read(self, verbose=False, parm_encoding='utf-8', keep_raw=True):
         """
         Reads the file given in file_path into a sidpy dataset
 
@@ -46,6 +177,9 @@ class IgorMatrixReader(Reader):
         parm_encoding : str, optional
             Codec to be used to decode the bytestrings into Python strings if
             needed. Default 'utf-8'
+        keep_raw : Boolean (Optional)
+            Whether or not to keep the raw note lines ('parm_list') and wave
+            header ('other_parms') in the metadata. Default True
 
         Returns
         -------
@@ -62,6 +196,7 @@ class IgorMatrixReader(Reader):
 
         data_mat = ibw_obj['wave']['wData']
         if self.parm_dict['datatype']=='image':
+            # np.rot90 only returns a rotated view; the one copy is made by Dataset.from_array
             data_mat = np.rot90(data_mat,3)
             xvec = np.linspace(0, self.parm_dict['image_width'], data_mat.shape[1])
             yvec = np.linspace(0, self.parm_dict['image_height'], data_mat.shape[0] )
@@ -88,8 +223,8 @@ class IgorMatrixReader(Reader):
             data_set.original_metadata = self.parm_dict
         elif self.parm_dict['datatype']=='Volume CITS':
             #build spectroscopy wave
-            bias_start = float(self.parm_dict['parm_list'][self.parm_dict['spec_curve_idx']].split('start =')[1].split(',')[0])
-            bias_end = float(self.parm_dict['parm_list'][self.parm_dict['spec_curve_idx']].split('end =')[1].split(',')[0])
+            bias_match = _BIAS_RANGE_RE.search(self.parm_dict['parm_list'][self.parm_dict['spec_curve_idx']])
+            bias_start, bias_end = float(bias_match.group(1)), float(bias_match.group(2))
             bias_wave = np.linspace(bias_start, bias_end, self.parm_dict['spec_points_per_curve'])
             xvec = np.linspace(0, self.parm_dict['image_width'], data_mat.shape[0])
             yvec = np.linspace(0, self.parm_dict['image_height'], data_mat.shape[1])
@@ -120,6 +255,11 @@ class IgorMatrixReader(Reader):
             # append metadata
             data_set.original_metadata = parm_dict
 
+        if not keep_raw:
+            # the raw note lines and wave header are only needed while building the dataset
+            for key in ['parm_list', 'other_parms']:
+                parm_dict.pop(key, None)
+
         # Return the dataset
         return data_set
 
@@ -141,59 +281,46 @@ class IgorMatrixReader(Reader):
         parm_dict : dictionary
             Dictionary containing parameters
         """
-        parm_string = ibw_wave.get('note')
-        if type(parm_string) == bytes:
-            try:
-                parm_string = parm_string.decode(codec)
-            except:
-                parm_string = parm_string.decode('ISO-8859-1')  # for older AR software
-        parm_string = parm_string.rstrip('\r')
+        parm_string = _decode_note(ibw_wave, codec)
         parm_list = parm_string.split('\r')
         parm_dict = dict()
-        for pair_string in parm_list:
-            for split_parm in [':', '=']:
-                temp = pair_string.split(split_parm)
-                if len(temp) == 2:
-                    temp = [item.strip() for item in temp]
-                    try:
-                        num = float(temp[1])
-                        parm_dict[temp[0]] = num
-                        try:
-                            if num == int(num):
-                                parm_dict[temp[0]] = int(num)
-                        except OverflowError:
-                            pass
-                    except ValueError:
-                        parm_dict[temp[0]] = temp[1]
+        # index of the first line containing each of these, found in the same pass
+        line_markers = ['Width', 'lines per image', 'Channel name',
+                        'Spectroscopy points', 'Scan Sub-Grid', 'axis start']
+        marker_idx = dict()
+        for ind, pair_string in enumerate(parm_list):
+            _parse_parm_line(pair_string, parm_dict)
+            for marker in line_markers:
+                if marker not in marker_idx and marker in pair_string:
+                    marker_idx[marker] = ind
 
         # Grab the creation and modification times:
-        other_parms = ibw_wave.get('wave_header')
-        for key in ['creationDate', 'modDate', 'bname']:
-            try:
-                parm_dict[key] = other_parms[key]
-            except KeyError:
-                pass
-        wh_idx =  [ind for ind in range(len(parm_list)) if 'Width' in parm_list[ind]][0]
-        lines_img_idx = [ind for ind in range(len(parm_list)) if 'lines per image' in parm_list[ind]][0]
-        channel_idx = [ind for ind in range(len(parm_list)) if 'Channel name' in parm_list[ind]][0]
+        other_parms = _read_wave_header(ibw_wave, parm_dict)
+        wh_idx = marker_idx['Width']
+        lines_img_idx = marker_idx['lines per image']
+        channel_idx = marker_idx['Channel name']
         
-        parm_dict['image_width'] = float(parm_list[wh_idx].split('=')[2][:-3])
-        parm_dict['image_height'] = float(parm_list[wh_idx].split('=')[-1][:-3])
-        parm_dict['image_units'] = parm_list[wh_idx].split('=')[-1][-3:][1]
-        parm_dict['channel_name'] = parm_list[channel_idx].split(':')[1][:-3]
-        parm_dict['channel_unit'] = parm_list[channel_idx].split(':')[1][-3:][1]
+        wh_parts = parm_list[wh_idx].split('=')
+        parm_dict['image_width'] = float(wh_parts[2][:-3])
+        parm_dict['image_height'] = float(wh_parts[-1][:-3])
+        parm_dict['image_units'] = wh_parts[-1][-3:][1]
+        channel_part = parm_list[channel_idx].split(':')[1]
+        parm_dict['channel_name'] = channel_part[:-3]
+        parm_dict['channel_unit'] = channel_part[-3:][1]
 
         if 'Volume CITS' in parm_dict:
             print('this is CITS') 
-            spec_lines_idx = [ind for ind in range(len(parm_list)) if 'Spectroscopy points' in parm_list[ind]][0]
-            sub_grid_idx = [ind for ind in range(len(parm_list)) if 'Scan Sub-Grid' in parm_list[ind]][0]
-            spec_curve_idx = [ind for ind in range(len(parm_list)) if 'axis start' in parm_list[ind]][0]
+            spec_lines_idx = marker_idx['Spectroscopy points']
+            sub_grid_idx = marker_idx['Scan Sub-Grid']
+            spec_curve_idx = marker_idx['axis start']
             parm_dict['spec_curve_idx'] = spec_curve_idx
-            parm_dict['scan_subgrid_x'] = int(re.findall(r'\d+',parm_list[sub_grid_idx].split('=')[1])[0])
-            parm_dict['scan_subgrid_y'] = int(re.findall(r'\d+',parm_list[sub_grid_idx].split('=')[2])[0])
-            parm_dict['spec_points_per_line'] =  int(re.findall(r'\d+', parm_list[spec_lines_idx].split('=')[1])[0])
-            parm_dict['spec_lines_per_plane'] = int(re.findall(r'\d+', parm_list[spec_lines_idx].split('=')[-1])[0])
-            parm_dict['spec_points_per_curve'] = int(parm_list[spec_curve_idx].split('curve =')[1].split(',')[0])
+            sub_grid_parts = parm_list[sub_grid_idx].split('=')
+            spec_lines_parts = parm_list[spec_lines_idx].split('=')
+            parm_dict['scan_subgrid_x'] = int(re.search(r'\d+', sub_grid_parts[1]).group())
+            parm_dict['scan_subgrid_y'] = int(re.search(r'\d+', sub_grid_parts[2]).group())
+            parm_dict['spec_points_per_line'] = int(re.search(r'\d+', spec_lines_parts[1]).group())
+            parm_dict['spec_lines_per_plane'] = int(re.search(r'\d+', spec_lines_parts[-1]).group())
+            parm_dict['spec_points_per_curve'] = int(_CURVE_POINTS_RE.search(parm_list[spec_curve_idx]).group(1))
             parm_dict['lines_img_idx'] = parm_list[lines_img_idx]
             parm_dict['datatype'] = 'Volume CITS'    
             
@@ -226,33 +353,7 @@ class IgorMatrixReader(Reader):
         default_units : list of strings
             List of units for the measurement in each channel
         """
-        temp = ibw_wave.get('labels')
-        labels = []
-        for item in temp:
-            if len(item) > 0:
-                labels += item
-        for item in labels:
-            if item == '':
-                labels.remove(item)
-
-        default_units = list()
-        for chan_ind, chan in enumerate(labels):
-            # clean up channel names
-            if type(chan) == bytes:
-                chan = chan.decode(codec)
-            if chan.lower().rfind('trace') > 0:
-                labels[chan_ind] = chan[:chan.lower().rfind('trace') + 5]
-            else:
-                labels[chan_ind] = chan
-            # Figure out (default) units
-            if chan.startswith('Phase'):
-                default_units.append('deg')
-            elif chan.startswith('Current'):
-                default_units.append('A')
-            else:
-                default_units.append('m')
-
-        return labels, default_units
+        return _get_chan_labels(ibw_wave, codec)
 
 class IgorIBWReader(Reader):
     """
@@ -315,10 +416,18 @@ class IgorIBWReader(Reader):
 
             num_rows = parm_dict['ScanLines']
             num_cols = parm_dict['ScanPoints']
+            # the scan axes are the same for every channel
+            xvec = np.linspace(0, parm_dict['FastScanSize'], num_cols)
+            yvec = np.linspace(0, parm_dict['SlowScanSize'], num_rows)
+
+            # Dataset.from_array copies anything that is not a dask array, so slice the
+            # channels out of one dask array over the whole stack instead.
+            # name=False skips hashing the whole stack for a dask token
+            image_stack = da.from_array(images, chunks=(images.shape[0], images.shape[1], 1), name=False)
 
             for channel in range(images.shape[-1]):
                 #Convert it to sidpy dataset object
-                data_set = sid.Dataset.from_array(images[:,:,channel], name=chan_labels[channel])
+                data_set = sid.Dataset.from_array(image_stack[:,:,channel], name=chan_labels[channel])
                 data_set.data_type = 'Image'
 
                 #Add quantity and units
@@ -326,11 +435,11 @@ class IgorIBWReader(Reader):
                 data_set.quantity = chan_labels[channel]
 
                 #Add dimension info
-                data_set.set_dimension(0, sid.Dimension(np.linspace(0, parm_dict['FastScanSize'], num_cols),
+                data_set.set_dimension(0, sid.Dimension(xvec,
                                                         name = 'x',
                                                         units=chan_units[channel], quantity = 'x',
                                                         dimension_type='spatial'))
-                data_set.set_dimension(1, sid.Dimension(np.linspace(0, parm_dict['SlowScanSize'], num_rows),
+                data_set.set_dimension(1, sid.Dimension(yvec,
                                                         name = 'y',
                                                         units=chan_units[channel], quantity='y',
                                                         dimension_type='spatial'))
@@ -349,19 +458,19 @@ class IgorIBWReader(Reader):
             if verbose:
                 print('Found force curve of size {}'.format(images.shape))
 
-            images = np.atleast_3d(images)  # now [Z, chan, 1]
+            # always a view; unlike np.atleast_3d, a single 1D curve becomes [Z, 1, 1] rather than [1, Z, 1]
+            images = images.reshape(images.shape + (1,) * (3 - images.ndim))  # now [Z, chan, 1]
 
             # Find the channel that corresponds to either Z sensor or Raw:
-            try:
-                chan_ind = chan_labels.index('ZSnsr')
-                spec_data = images[:,chan_ind].squeeze()
-            except ValueError:
-                try:
-                    chan_ind = chan_labels.index('Raw')
-                    spec_data = images[:,chan_ind,0].squeeze()
-                except ValueError:
-                    # We don't expect to come here. If we do, spectroscopic values remains as is
-                    spec_data = np.arange(images.shape[2])
+            label_idx = dict()
+            for ind, label in enumerate(chan_labels):
+                label_idx.setdefault(label, ind)
+            chan_ind = label_idx.get('ZSnsr', label_idx.get('Raw'))
+            if chan_ind is not None:
+                spec_data = images[:,chan_ind,0]
+            else:
+                # We don't expect to come here. If we do, spectroscopic values remains as is
+                spec_data = np.arange(images.shape[0])
 
             #Go through the channels
             for channel in range(images.shape[-2]):
@@ -414,38 +523,14 @@ class IgorIBWReader(Reader):
         parm_dict : dictionary
             Dictionary containing parameters
         """
-        parm_string = ibw_wave.get('note')
-        if type(parm_string) == bytes:
-            try:
-                parm_string = parm_string.decode(codec)
-            except:
-                parm_string = parm_string.decode('ISO-8859-1')  # for older AR software
-        parm_string = parm_string.rstrip('\r')
-        parm_list = parm_string.split('\r')
+        parm_string = _decode_note(ibw_wave, codec)
         parm_dict = dict()
-        for pair_string in parm_list:
-            for split_parm in [':', '=']:
-                temp = pair_string.split(split_parm)
-                if len(temp) == 2:
-                    temp = [item.strip() for item in temp]
-                    try:
-                        num = float(temp[1])
-                        parm_dict[temp[0]] = num
-                        try:
-                            if num == int(num):
-                                parm_dict[temp[0]] = int(num)
-                        except OverflowError:
-                            pass
-                    except ValueError:
-                        parm_dict[temp[0]] = temp[1]
+        # only lines with a separator can hold parameters, so the others never become strings
+        for pair_string in _PARM_LINE_RE.findall(parm_string):
+            _parse_parm_line(pair_string, parm_dict)
 
         # Grab the creation and modification times:
-        other_parms = ibw_wave.get('wave_header')
-        for key in ['creationDate', 'modDate', 'bname']:
-            try:
-                parm_dict[key] = other_parms[key]
-            except KeyError:
-                pass
+        _read_wave_header(ibw_wave, parm_dict)
         return parm_dict
 
     @staticmethod
@@ -468,33 +553,7 @@ class IgorIBWReader(Reader):
         default_units : list of strings
             List of units for the measurement in each channel
         """
-        temp = ibw_wave.get('labels')
-        labels = []
-        for item in temp:
-            if len(item) > 0:
-                labels += item
-        for item in labels:
-            if item == '':
-                labels.remove(item)
-
-        default_units = list()
-        for chan_ind, chan in enumerate(labels):
-            # clean up channel names
-            if type(chan) == bytes:
-                chan = chan.decode(codec)
-            if chan.lower().rfind('trace') > 0:
-                labels[chan_ind] = chan[:chan.lower().rfind('trace') + 5]
-            else:
-                labels[chan_ind] = chan
-            # Figure out (default) units
-            if chan.startswith('Phase'):
-                default_units.append('deg')
-            elif chan.startswith('Current'):
-                default_units.append('A')
-            else:
-                default_units.append('m')
-
-        return labels, default_units
+        return _get_chan_labels(ibw_wave, codec)
 
     def can_read(self):
         """
@@ -43,10 +43,16 @@ Example:
         dataset.plot()
 """
 
-import struct
 import re
+import io
+import os
 import sys
+import functools
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+from numba import njit, prange
 import sidpy as sid
 from sidpy.sid import Reader
 from pathlib import Path
@@ -89,52 +95,65 @@ class WSxM2DReader(Reader):
 
         filepath = Path(self._input_file_path)
         filepath_all = WSxMFuncs._wsxm_get_common_files(filepath) #get all files of measurement, with common base name
+        filepath_all = [path_i for path_i in filepath_all if path_i.suffix != '.gsi'] #ignore *.gsi files sharing same name
+        #channel files are independent, read them concurrently (file I/O releases the GIL)
+        if len(filepath_all) < 3:
+            data_dict_all = [self._read_channel(path_i) for path_i in filepath_all]
+        else:
+            with ThreadPoolExecutor(max_workers=min(8, len(filepath_all))) as executor:
+                data_dict_all = list(executor.map(self._read_channel, filepath_all))
+
         datasets = {}
         channel_number = 0 #channel number
-        for path_i in filepath_all:
-            path_ext = path_i.suffix  #file extension
-            if path_ext != '.gsi': #ignore *.gsi files sharing same name               
-                file = open(f'{path_i}','rb')
-                header_dict, pos = WSxMFuncs._wsxm_readheader(file)
-                header_dict['File path'] = path_i #file path included to header
-                chan_label = header_dict['Acquisition channel [General Info]']
-                data_dict_chan, pos = WSxMFuncs._wsxm_readimg(file, header_dict, pos)
-                file.close()
-                if 'X scanning direction [General Info]' in header_dict.keys():
-                    x_dir = header_dict['X scanning direction [General Info]']
-                else:
-                    x_dir = None
+        for data_dict_chan in data_dict_all:
+            header_dict = data_dict_chan['header']
+            chan_label = header_dict['Acquisition channel [General Info]']
+            if 'X scanning direction [General Info]' in header_dict:
+                x_dir = header_dict['X scanning direction [General Info]']
+            else:
+                x_dir = None
 
-                data_set = sid.Dataset.from_array(np.flip(data_dict_chan['data']['Z'].T),
-                                                  title=chan_label)
-                
-                #Add quantity and units
-                data_set.units = data_dict_chan['units']['Z']
-                data_set.quantity = chan_label
-                data_set.direction = x_dir #image direction information
-                data_set.data_type = 'image'                
+            data_set = sid.Dataset.from_array(data_dict_chan['data']['Z'].T[::-1, ::-1], #flipped view, copied once by sidpy
+                                              title=chan_label)
+            
+            #Add quantity and units
+            data_set.units = data_dict_chan['units']['Z']
+            data_set.quantity = chan_label
+            data_set.direction = x_dir #image direction information
+            data_set.data_type = 'image'                
 
-                #Add dimension info
-                data_set.set_dimension(0, sid.Dimension(data_dict_chan['data']['X'],
-                                                        name = 'x',
-                                                        units=data_dict_chan['units']['X'], 
-                                                        quantity = 'x',
-                                                        dimension_type='spatial'))
-                data_set.set_dimension(1, sid.Dimension(data_dict_chan['data']['Y'],
-                                                        name = 'y',
-                                                        units=data_dict_chan['units']['Y'], 
-                                                        quantity='y',
-                                                        dimension_type='spatial')) 
-                #Writing the metadata
-                data_set.metadata = data_dict_chan['header'].copy()
+            #Add dimension info
+            data_set.set_dimension(0, sid.Dimension(data_dict_chan['data']['X'],
+                                                    name = 'x',
+                                                    units=data_dict_chan['units']['X'], 
+                                                    quantity = 'x',
+                                                    dimension_type='spatial'))
+            data_set.set_dimension(1, sid.Dimension(data_dict_chan['data']['Y'],
+                                                    name = 'y',
+                                                    units=data_dict_chan['units']['Y'], 
+                                                    quantity='y',
+                                                    dimension_type='spatial')) 
+            #Writing the metadata
+            data_set.metadata = data_dict_chan['header'].copy()
 
-                #Add dataset to dictionary
-                key_channel = f"Channel_{int(channel_number):03d}"
-                datasets[key_channel] = data_set
-                channel_number += 1
+            #Add dataset to dictionary
+            key_channel = f"Channel_{int(channel_number):03d}"
+            datasets[key_channel] = data_set
+            channel_number += 1
 
         return datasets
 
+    @staticmethod
+    def _read_channel(path_i):
+        """
+        Reads the header and image data of a single channel file, see WSxMFuncs._wsxm_readimg.
+        """
+        with open(path_i, 'rb', buffering=1024*1024) as file:
+            header_dict, pos = WSxMFuncs._wsxm_readheader(file)
+            header_dict['File path'] = path_i #file path included to header
+            data_dict_chan, pos = WSxMFuncs._wsxm_readimg(file, header_dict, pos)
+        return data_dict_chan
+
 # Read one dimensional AFM data (e.g. force-distance curves)        
 class WSxM1DReader(Reader):
     def __init__(self, file_path, *args, **kwargs):
@@ -170,46 +189,49 @@ class WSxM1DReader(Reader):
         filepath = Path(self._input_file_path)
         filepath_all = WSxMFuncs._wsxm_get_common_files(filepath) #get all files of measurement, with common base name
 
+        paths_spect = [path_i for path_i in filepath_all if path_i.suffix in ('.curves', '.stp', '.cur')]
+        #spectroscopy files are often many small files, read them ahead concurrently. Parsing below stays sequential
+        if len(paths_spect) < 3:
+            file_data_all = ((path_i, None) for path_i in paths_spect) #files opened by the readers
+        else:
+            file_data_all = self._prefetch_files(paths_spect)
+
         data_dict_chan = {}
         data_dict_stp = {} #dictionary for *.stp files to combine approach and retract data from separate files
         datasets = {}
         channel_number = 0 #channel number
-        for path_i in filepath_all:
-            path_ext = path_i.suffix                
+        for path_i, file_data in file_data_all:
+            path_ext = path_i.suffix
             if path_ext == '.curves': # read *.curves spectroscopy files
-                temp_dict, chan_label = WSxMFuncs._wsxm_readcurves(path_i)
-                if chan_label not in data_dict_chan.keys():
-                    data_dict_chan[chan_label] = temp_dict[chan_label].copy()
-                else:
-                    for curv_ind_i in temp_dict[chan_label]['curves'].keys(): #replace with *.curves data even if it already exists (more robust)
-                        data_dict_chan[chan_label]['curves'][curv_ind_i] = temp_dict[chan_label]['curves'][curv_ind_i].copy()
+                temp_dict, chan_label = WSxMFuncs._wsxm_readcurves(path_i, file_data)
+                if chan_label not in data_dict_chan:
+                    data_dict_chan[chan_label] = temp_dict[chan_label]
+                else: #replace with *.curves data even if it already exists (more robust)
+                    data_dict_chan[chan_label]['curves'].update(temp_dict[chan_label]['curves'])
             elif path_ext == '.stp': # read *.stp spectroscopy files
-                temp_dict, chan_label = WSxMFuncs._wsxm_readstp(path_i, data_dict_stp)
-                if chan_label not in data_dict_chan.keys(): #ignore data if *.curves already found
-                    data_dict_chan[chan_label] = temp_dict[chan_label].copy()
+                temp_dict, chan_label = WSxMFuncs._wsxm_readstp(path_i, data_dict_stp, file_data)
+                if chan_label not in data_dict_chan: #ignore data if *.curves already found
+                    data_dict_chan[chan_label] = temp_dict[chan_label]
                 else:
-                    for curv_ind_i in temp_dict[chan_label]['curves'].keys():
-                        if curv_ind_i not in data_dict_chan[chan_label]['curves'].keys():
-                            data_dict_chan[chan_label]['curves'][curv_ind_i] = temp_dict[chan_label]['curves'][curv_ind_i].copy()
+                    for curv_ind_i, curvdata_i in temp_dict[chan_label]['curves'].items():
+                        data_dict_chan[chan_label]['curves'].setdefault(curv_ind_i, curvdata_i)
             elif path_ext == '.cur': # read *.cur spectroscopy files
-                temp_dict, chan_label = WSxMFuncs._wsxm_readcur(path_i)
-                if chan_label not in data_dict_chan.keys(): #ignore data if *.curves already found
-                    data_dict_chan[chan_label] = temp_dict[chan_label].copy()
+                temp_dict, chan_label = WSxMFuncs._wsxm_readcur(path_i, file_data)
+                if chan_label not in data_dict_chan: #ignore data if *.curves already found
+                    data_dict_chan[chan_label] = temp_dict[chan_label]
                 else:
-                    for curv_ind_i in temp_dict[chan_label]['curves'].keys():
-                        if curv_ind_i not in data_dict_chan[chan_label]['curves'].keys():
-                            data_dict_chan[chan_label]['curves'][curv_ind_i] = temp_dict[chan_label]['curves'][curv_ind_i].copy()        
+                    for curv_ind_i, curvdata_i in temp_dict[chan_label]['curves'].items():
+                        data_dict_chan[chan_label]['curves'].setdefault(curv_ind_i, curvdata_i)
 
         #convert data dictionary to SID dataset
         for chan_i, chandata_i in data_dict_chan.items():
             for curv_i, curvdata_i in chandata_i['curves'].items():
-                curve_list = []
-                curve_dir_list = []
-                for curv_dir_i, curvdata_dir_i in curvdata_i['data'].items():
-                    curve_list.append(curvdata_dir_i['y'])
-                    curve_dir_list.append(curv_dir_i)
+                curve_dir_list = list(curvdata_i['data'].keys())
+                curve_len = len(curvdata_i['data'][curve_dir_list[0]]['y'])
+                curve_matrix = np.empty((curve_len, len(curve_dir_list))) #one column per curve direction
+                for j, curvdata_dir_i in enumerate(curvdata_i['data'].values()):
+                    curve_matrix[:, j] = curvdata_dir_i['y']
                     x_data_i = curvdata_dir_i['x']
-                curve_matrix = np.vstack(curve_list).T
 
                 data_set = sid.Dataset.from_array(curve_matrix, title=f'{chan_i} ({curv_i})')
                 
@@ -236,6 +258,21 @@ class WSxM1DReader(Reader):
 
         return datasets
 
+    @staticmethod
+    def _prefetch_files(paths, window=8):
+        """
+        Yields (path, file contents) in the order of `paths`, reading at most `window` files ahead in background threads.
+        """
+        paths_iter = iter(paths)
+        with ThreadPoolExecutor(max_workers=window) as executor:
+            pending = deque((path_i, executor.submit(path_i.read_bytes)) for path_i in itertools.islice(paths_iter, window))
+            while pending:
+                path_i, future = pending.popleft()
+                path_next = next(paths_iter, None)
+                if path_next is not None:
+                    pending.append((path_next, executor.submit(path_next.read_bytes)))
+                yield path_i, future.result()
+
 
 # Read three dimensional AFM image data (e.g. Force volume, video etc)
 class WSxM3DReader(Reader):
@@ -289,54 +326,64 @@ class WSxM3DReader(Reader):
             else:
                 assert("Invalid file type. Please choose *.gsi/*.MOV/*.mpp file")
 
+            data_chan = data_dict_chan['data']
+            units_chan = data_dict_chan['units']
+            header_chan = data_dict_chan['header']
+
             #image rotated to correct orientation of measurement in final dataset
-            data_set = sid.Dataset.from_array(np.flip(np.rot90(data_dict_chan['data']['ZZ'], k=1, axes=(2,1)), axis=1),
+            #(same as np.flip(np.rot90(ZZ, k=1, axes=(2,1)), axis=1) as a single strided view)
+            data_set = sid.Dataset.from_array(data_chan['ZZ'][:, ::-1, ::-1].transpose(0, 2, 1),
                                                 title=chan_label)
             
             #Add quantity and units
-            data_set.units = data_dict_chan['units']['ZZ']
+            data_set.units = units_chan['ZZ']
             data_set.quantity = chan_label
             data_set.data_type = zz_data_type            
 
             #Add dimension info
-            data_set.set_dimension(0, sid.Dimension(data_dict_chan['data']['Z'],
+            data_set.set_dimension(0, sid.Dimension(data_chan['Z'],
                                                     name = 'z',
-                                                    units=data_dict_chan['units']['Z'], 
+                                                    units=units_chan['Z'], 
                                                     quantity = 'z',
                                                     dimension_type=z_dimension_type))
-            data_set.set_dimension(1, sid.Dimension(data_dict_chan['data']['X'],
+            data_set.set_dimension(1, sid.Dimension(data_chan['X'],
                                                     name = 'x',
-                                                    units=data_dict_chan['units']['X'], 
+                                                    units=units_chan['X'], 
                                                     quantity='x',
                                                     dimension_type='spatial'))
-            data_set.set_dimension(2, sid.Dimension(data_dict_chan['data']['Y'],
+            data_set.set_dimension(2, sid.Dimension(data_chan['Y'],
                                                     name = 'y',
-                                                    units=data_dict_chan['units']['Y'], 
+                                                    units=units_chan['Y'], 
                                                     quantity='y',
                                                     dimension_type='spatial')) 
             
             #Writing the metadata            
-            header_spectroscopy = {k: v for k, v in data_dict_chan['header'].items() if "[Spectroscopy images ramp value list]" in k or "[maxmins list]" in k}
-            header_general = {k: v for k, v in data_dict_chan['header'].items() if k not in header_spectroscopy.keys()}
-            data_set.metadata = header_general.copy()
+            header_spectroscopy = {}
+            header_general = {}
+            for k, v in header_chan.items():
+                if "[Spectroscopy images ramp value list]" in k or "[maxmins list]" in k:
+                    header_spectroscopy[k] = v
+                else:
+                    header_general[k] = v
+            data_set.metadata = header_general
             data_set.metadata['Spectroscopy metadata'] = header_spectroscopy
             if zz_data_type == sid.DataType.SPECTRAL_IMAGE: 
-                data_set.direction = data_dict_chan['header']['Spectroscopy type [General Info]'] #image direction information
+                data_set.direction = header_chan['Spectroscopy type [General Info]'] #image direction information
                 #create topography dataset
-                data_set_topo = sid.Dataset.from_array(np.flip(topo_data.T), title='Topography')
-                data_set_topo.set_dimension(0, sid.Dimension(data_dict_chan['data']['X'],
+                data_set_topo = sid.Dataset.from_array(topo_data.T[::-1, ::-1], title='Topography')
+                data_set_topo.set_dimension(0, sid.Dimension(data_chan['X'],
                                                     name = 'x',
-                                                    units=data_dict_chan['units']['X'], 
+                                                    units=units_chan['X'], 
                                                     quantity='x',
                                                     dimension_type='spatial'))
-                data_set_topo.set_dimension(1, sid.Dimension(data_dict_chan['data']['Y'],
+                data_set_topo.set_dimension(1, sid.Dimension(data_chan['Y'],
                                                         name = 'y',
-                                                        units=data_dict_chan['units']['Y'], 
+                                                        units=units_chan['Y'], 
                                                         quantity='y',
                                                         dimension_type='spatial'))
-                data_set_topo.units = data_dict_chan['units']['Z']
+                data_set_topo.units = units_chan['Z']
                 data_set_topo.quantity = 'Topography'
-                data_set_topo.direction = data_dict_chan['header']['Spectroscopy type [General Info]'].split(' ')[1] #image direction information
+                data_set_topo.direction = header_chan['Spectroscopy type [General Info]'].split(' ')[1] #image direction information
                 data_set_topo.data_type = 'image'
 
                 data_set.metadata['Topography'] = data_set_topo #topography data added to metadata
@@ -362,15 +409,15 @@ class WSxMFuncs():
     Methods
     -------
     _wsxm_get_common_files(filepath, ext=None)
-    _wsxm_readheader(file, pos=0, inibyte=100)
+    _wsxm_readheader(file, pos=0, inibyte=4096)
     _wsxm_readimg(file, header_dict, pos)
     _wsxm_readcurves(filepath)
     """
-    # binary data type definitions used in header file
+    # binary data type definitions used in header file: (point length, numpy dtype)
     DATA_TYPES = {
-        'short':(2,'h'),'short-data':(2,'h'), 'unsignedshort':(2,'H'),
-        'integer-data':(4,'i'), 'signedinteger':(4,'i'),
-        'float-data':(4,'f'), 'double':(8,'d')
+        'short':(2,'<i2'),'short-data':(2,'<i2'), 'unsignedshort':(2,'<u2'),
+        'integer-data':(4,'<i4'), 'signedinteger':(4,'<i4'),
+        'float-data':(4,'<f4'), 'double':(8,'<f8')
                 }
     
     #rename spectroscopy line to standard names: approach and retract
@@ -379,6 +426,12 @@ class WSxMFuncs():
         'b': 'retract', 'f': 'approach'
                 } 
 
+    #4 digit measurement number in standard WSxM file names
+    _FNUM_RE = re.compile(r'\_\d{4}')
+    #header lines, either 'name: value' or a section title (lines with several ':' are ignored)
+    _HEADER_LINE_RE = re.compile(r'(?<![^\r\n])(?:([^:\r\n]*):([^:\r\n]*)|([^:\r\n]+))(?![^\r\n])')
+    _HEADER_SIZE_RE = re.compile(rb'(?<![^\r\n])Image header size:([^:\r\n]*)(?![^\r\n])')
+
     
     @staticmethod
     def _wsxm_get_common_files(filepath, ext=None):
@@ -408,64 +461,100 @@ class WSxMFuncs():
 
         path_dir = filepath.parent
         filename = filepath.name
-        match = re.search(r'\_\d{4}', filename) #regex to find 4 digit number in filename
+        match = WSxMFuncs._FNUM_RE.search(filename) #regex to find 4 digit number in filename
         if match == None: #return same file if no matches
             return [filepath]
         else:
             filename_com = filename[:match.start()+5]
 
-        files = []
-        for path_i in path_dir.iterdir():
-            path_ext_i = path_i.suffix
-            if ext != None and path_ext_i != ext: #if ext given, skip files dont match the extension
-                continue
-            if path_i.is_file() and path_i.name.startswith(filename_com):
-                files.append(path_i) 
-        files.remove(filepath) #make sure filepath is the first item in the list
-        files.insert(0, filepath)
-        return files
+        #not cached: directory mtime is too coarse on some filesystems to notice files added in the same tick
+        names = WSxMFuncs._wsxm_list_common_files(path_dir, filename_com, ext)
+        #make sure filepath is the first item in the list
+        return [filepath] + [path_dir / name_i for name_i in names if name_i != filename]
 
+    @staticmethod
+    def _wsxm_list_common_files(path_dir, filename_com, ext):
+        """
+        Lists the names of the files in `path_dir` starting with `filename_com`, optionally
+        filtered by extension.
+        """
+        names = []
+        with os.scandir(path_dir) as entries:
+            for entry in entries:
+                name_i = entry.name
+                if ext != None and os.path.splitext(name_i)[1] != ext: #if ext given, skip files dont match the extension
+                    continue
+                if name_i.startswith(filename_com) and entry.is_file():
+                    names.append(name_i)
+        return names
+
+
+    #evenly spaced axis values, shared between files of the same measurement
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _wsxm_axis(start, stop, num):
+        """
+        Returns `num` evenly spaced values from `start` to `stop` (both included), as np.linspace.
+        Results are cached and therefore read-only, copy them before modifying.
+        """
+        axis = np.linspace(start, stop, num, endpoint=True)
+        axis.setflags(write=False)
+        return axis
 
     #read WSxM header data
     @staticmethod
-    def _wsxm_readheader(file, pos=0, inibyte=100):
+    def _wsxm_readheader(file, pos=0, inibyte=4096):
         """
         Reads the header of a WSxM file and returns it as a dictionary.
         Parameters:
         file (file object): The file object to read from.
         pos (int, optional): The position in the file (in bytes) to start reading from. Defaults to 0.
-        inibyte (int, optional): The initial number of bytes to read to find 'Image header size'. Defaults to 100.
+        inibyte (int, optional): The initial number of bytes to read to find 'Image header size'. Defaults to 4096,
+            enough to hold most headers completely so that no second read is needed.
         Returns:
             tuple: A tuple containing:
                 - header_dict (dict): A dictionary containing the header information.
                 - pos_new (int): The new position (in bytes) in the file after reading the header.
         """
 
-        header_dict = {}
-        title_list = []
         # Find header size
         file.seek(pos, 0)
         data = file.read(inibyte)
-        for ln in data.splitlines():
-            hd_lst = ln.decode('latin-1', errors='ignore').split(':')
-            if len(hd_lst) == 2:
-                if hd_lst[0] == 'Image header size':
-                    header_size = int(hd_lst[1])
-                    break
-        # read header data
-        file.seek(pos, 0)
-        data = file.read(header_size)
-        for ln in data.splitlines():
-            hd_lst = ln.decode('latin-1', errors='ignore').split(':')
-            if len(hd_lst) == 2:
-                header_name = f"{hd_lst[0].strip()} {title_list[-1]}".strip()
-                header_dict[header_name] = hd_lst[1].strip()
-            elif len(hd_lst) == 1 and hd_lst[0] != '': #collect section tiles in header file
-                title_list.append(hd_lst[0])
+        header_size = int(WSxMFuncs._HEADER_SIZE_RE.search(data).group(1))
+        # read header data, only the part not already read above
+        if header_size > len(data):
+            data += file.read(header_size - len(data))
+        else:
+            data = data[:header_size]
+        header_dict = dict(WSxMFuncs._wsxm_parseheader(data)) #copy, the cached dictionary must not be modified
         
         pos_new = pos + header_size #bytes read so far
         return header_dict, pos_new
 
+    #parse WSxM header text
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _wsxm_parseheader(data):
+        """
+        Parses the raw bytes of a WSxM header into a dictionary. Results are cached by the header
+        content, so files and curves sharing the same header are parsed only once.
+        Parameters:
+        data (bytes): The complete header as read from the file.
+        Returns:
+            dict: A dictionary containing the header information. Do not modify it, make a copy instead.
+        """
+
+        header_dict = {}
+        title = ''
+        for match in WSxMFuncs._HEADER_LINE_RE.finditer(data.decode('latin-1')):
+            name, value, section = match.groups()
+            if section is None:
+                header_name = f"{name.strip()} {title}".strip()
+                header_dict[header_name] = value.strip()
+            else: #section titles in header file
+                title = section
+        return header_dict
+
     #read WSxM binary image data
     @staticmethod
     def _wsxm_readimg(file, header_dict, pos):
@@ -491,49 +580,46 @@ class WSxMFuncs():
         chan_label = header_dict['Acquisition channel [General Info]']
         x_num = int(header_dict['Number of rows [General Info]'])
         y_num = int(header_dict['Number of columns [General Info]'])
-        x_len = float(header_dict['X Amplitude [Control]'].split(' ')[0])
-        y_len = float(header_dict['Y Amplitude [Control]'].split(' ')[0])
-        z_len = float(header_dict['Z Amplitude [General Info]'].split(' ')[0])
+        x_len, x_unit = _header_num_unit(header_dict['X Amplitude [Control]'])
+        y_len, y_unit = _header_num_unit(header_dict['Y Amplitude [Control]'])
+        z_len, z_unit = _header_num_unit(header_dict['Z Amplitude [General Info]'])
         z_min = float(header_dict['Minimum [Miscellaneous]'])
         z_max = float(header_dict['Maximum [Miscellaneous]'])
-        if 'X starting offset [General Info]' in header_dict.keys(): #for "3D mode" images
-            x_offset = float(header_dict['X starting offset [General Info]'].split(' ')[0])
-            y_offset = float(header_dict['Y starting offset [General Info]'].split(' ')[0])
+        if 'X starting offset [General Info]' in header_dict: #for "3D mode" images
+            x_offset = _header_num(header_dict['X starting offset [General Info]'])
+            y_offset = _header_num(header_dict['Y starting offset [General Info]'])
         else:
             x_offset = 0
             y_offset = 0
 
-        x_data = np.linspace(x_offset, x_len+x_offset, x_num, endpoint=True)
-        y_data = np.linspace(y_len+y_offset, y_offset, y_num, endpoint=True)
+        x_data = WSxMFuncs._wsxm_axis(x_offset, x_len+x_offset, x_num)
+        y_data = WSxMFuncs._wsxm_axis(y_len+y_offset, y_offset, y_num)
         
         #read binary image data
-        point_length, type_code  = WSxMFuncs.DATA_TYPES[data_format]
-        file.seek(pos, 0)
+        point_length, np_dtype = WSxMFuncs.DATA_TYPES[data_format]
         data_len = x_num*y_num*point_length
-        bin_data = file.read(data_len)
-        ch_array = np.array(list(struct.iter_unpack(f'{type_code}', bin_data))).flatten()
+        ch_array = WSxMFuncs._wsxm_readstack(file, pos, (x_num, y_num), np_dtype)
 
         if z_len == 0: #for zero data
             z_calib = 1
         else:
             z_calib = z_len/(z_max-z_min)
         
-        z_unit = header_dict['Z Amplitude [General Info]'].split(' ')[-1]
 
         #the following fixes a bug in the data format for amplitude channel, ensures that data is read in volts, not nanometers (which is fake)
         if chan_label == 'Amplitude' and header_dict['Z Amplitude [General Info]'].split(' ')[1] != 'V':
-            chan_factor = float(header_dict['Conversion Factor 00 [General Info]'].split(' ')[0])
+            chan_factor = _header_num(header_dict['Conversion Factor 00 [General Info]'])
             z_calib = z_calib/chan_factor
             z_unit = 'V'
         
         #img data dictionary
-        data_dict_chan = {'data': {'Z': (z_calib*ch_array.reshape(x_num, y_num)),
+        data_dict_chan = {'data': {'Z': np.multiply(ch_array, z_calib, dtype=np.float64), #calibrated in double precision
                                 'X': x_data,
                                 'Y': y_data},
                         'header': header_dict.copy(),
                         'units': {'Z': z_unit,
-                                  'X': header_dict['X Amplitude [Control]'].split(' ')[-1],
-                                  'Y': header_dict['Y Amplitude [Control]'].split(' ')[-1]
+                                  'X': x_unit,
+                                  'Y': y_unit
                                   }
                         }
         
@@ -541,13 +627,46 @@ class WSxMFuncs():
         
         return data_dict_chan, pos
 
+    #open WSxM file, or wrap its contents if already read
+    @staticmethod
+    def _wsxm_open(filepath, file_data=None):
+        """
+        Returns a binary file object for `filepath`, reading from `file_data` (bytes) instead if given.
+        """
+        if file_data is not None:
+            return io.BytesIO(file_data)
+        return open(filepath, 'rb', buffering=1024*1024)
+
+    #read contiguous binary image stack
+    @staticmethod
+    def _wsxm_readstack(file, pos, shape, np_dtype):
+        """
+        Reads a contiguous block of binary data (image, image stack or curves) from a WSxM file directly into a preallocated array.
+        Parameters:
+        file (file object): The file object to read the data from.
+        pos (int): The position in the file (in bytes) of the data block.
+        shape (tuple): Shape of the data block, e.g. (number of images, columns, rows).
+        np_dtype (str): Numpy data type of the raw data (see DATA_TYPES).
+        Returns:
+            numpy.ndarray: The uncalibrated data.
+        Raises:
+            ValueError: If the file ends before the whole data block is read.
+        """
+
+        raw_array = np.empty(shape, dtype=np_dtype)
+        file.seek(pos, 0)
+        if file.readinto(memoryview(raw_array).cast('B')) != raw_array.nbytes:
+            raise ValueError(f'Unexpected end of file while reading {shape} data block')
+        return raw_array
+
     # read *.curves file with image and f-d curves
     @staticmethod
-    def _wsxm_readcurves(filepath):
+    def _wsxm_readcurves(filepath, file_data=None):
         """
         Reads WSxM spectroscopy curves (*.curves format) from a given file.
         Args:
             filepath (str): The path to the WSxM file to be read.
+            file_data (bytes, optional): Contents of the file, if already read. The file is opened otherwise.
         Returns:
             tuple: A tuple containing:
             - data_dict (dict): A dictionary containing the parsed data from the file.
@@ -578,81 +697,82 @@ class WSxMFuncs():
         """
 
         data_dict = {}
-        file = open(f'{filepath}','rb')
-        header_dict_top, pos = WSxMFuncs._wsxm_readheader(file)
-        data_dict_chan, pos = WSxMFuncs._wsxm_readimg(file, header_dict_top, pos) 
+        with WSxMFuncs._wsxm_open(filepath, file_data) as file:
+            header_dict_top, pos = WSxMFuncs._wsxm_readheader(file)
+            data_dict_chan, pos = WSxMFuncs._wsxm_readimg(file, header_dict_top, pos) 
         
-        data_format = header_dict_top['Image Data Type [General Info]']
-        point_length, type_code  = WSxMFuncs.DATA_TYPES[data_format]
-        data_dict_curv = {}
+            data_format = header_dict_top['Image Data Type [General Info]']
+            point_length, np_dtype = WSxMFuncs.DATA_TYPES[data_format]
+            data_dict_curv = {}
         
-        while True:
-            header_dict, pos = WSxMFuncs._wsxm_readheader(file, pos=pos)
-            header_dict['File path'] = filepath #file path included to header 
-            line_pts = int(header_dict['Number of points [General Info]'])
-            line_num = int(header_dict['Number of lines [General Info]'])
-            y_label = header_dict['Y axis text [General Info]'].split('[')[0].strip()
-            x_label = header_dict['X axis text [General Info]'].split('[')[0].strip()
-            curv_ind = int(header_dict['Index of this Curve [Control]'])
-            curv_num = int(header_dict['Number of Curves in this serie [Control]'])
-            chan_fact = float(header_dict['Conversion Factor 00 [General Info]'].split(' ')[0])
-            chan_inv = header_dict['Channel is inverted [General Info]']
-            if chan_inv == 'Yes':
-                chan_fact = -chan_fact
-            chan_offs = float(header_dict['Conversion Offset 00 [General Info]'].split(' ')[0])
-
-            header_dict['Spectroscopy channel'] = y_label #Insert channel name information into dictionary
+            while True:
+                header_dict, pos = WSxMFuncs._wsxm_readheader(file, pos=pos)
+                header_dict['File path'] = filepath #file path included to header 
+                line_pts = int(header_dict['Number of points [General Info]'])
+                line_num = int(header_dict['Number of lines [General Info]'])
+                y_label = header_dict['Y axis text [General Info]'].split('[')[0].strip()
+                x_label = header_dict['X axis text [General Info]'].split('[')[0].strip()
+                curv_ind = int(header_dict['Index of this Curve [Control]'])
+                curv_num = int(header_dict['Number of Curves in this serie [Control]'])
+                chan_fact, y_unit = _header_num_unit(header_dict['Conversion Factor 00 [General Info]'])
+                chan_inv = header_dict['Channel is inverted [General Info]']
+                if chan_inv == 'Yes':
+                    chan_fact = -chan_fact
+                chan_offs = _header_num(header_dict['Conversion Offset 00 [General Info]'])
+
+                header_dict['Spectroscopy channel'] = y_label #Insert channel name information into dictionary
             
-            line_order = ['approach', 'retract']
-            if header_dict['First Forward [Miscellaneous]'] == 'No': #CHECK THIS
-                line_order = ['retract', 'approach']
+                line_order = ['approach', 'retract']
+                if header_dict['First Forward [Miscellaneous]'] == 'No': #CHECK THIS
+                    line_order = ['retract', 'approach']
 
-            data_len = line_pts*line_num*2*point_length
-            file.seek(pos, 0)
+                data_len = line_pts*line_num*2*point_length
             
-            if line_pts == 0: #skip if no data for curve exists (bug in file format)
-                continue
+                if line_pts == 0: #skip if no data for curve exists (bug in file format)
+                    continue
             
-            bin_data = file.read(data_len)
-            ch_array = np.array(list(struct.iter_unpack(f'{type_code}', bin_data))).flatten()
-            x_data = np.split(ch_array[::2], line_num)
-            y_data = np.split(ch_array[1::2], line_num)
-
-            for j in range(int(line_num/len(line_order))):
-                k = len(line_order) * j
-                curv_ind_j = f'{curv_ind}{chr(ord("a")+j)}' if line_num > 2 else curv_ind
-                data_dict_curv[curv_ind_j] = {'header': header_dict_top.copy() | header_dict.copy(), #merge header dictionaries
-                                              'data': {},
-                                              'units': {'x': header_dict['X axis unit [General Info]'],
-                                                        'y': header_dict['Conversion Factor 00 [General Info]'].split(' ')[-1]
-                                                        }
-                                            } 
-                for i, curv_dir in enumerate(line_order):
-                    data_dict_curv[curv_ind_j]['data'][curv_dir] = {
-                        'x': x_data[k+i],
-                        'y': chan_offs+(y_data[k+i]*chan_fact)
-                        }                                                  
+                #points are stored as interleaved (x, y) pairs, line after line
+                ch_array = WSxMFuncs._wsxm_readstack(file, pos, (line_num, line_pts, 2), np_dtype)
+                x_data = ch_array[:, :, 0].astype(np.float64)
+                y_data = np.multiply(ch_array[:, :, 1], chan_fact, dtype=np.float64) #all lines converted to units at once
+                y_data += chan_offs
+
+                header_curv = header_dict_top | header_dict #merge header dictionaries, shared by all lines of this curve
+                for j in range(int(line_num/len(line_order))):
+                    k = len(line_order) * j
+                    curv_ind_j = f'{curv_ind}{chr(ord("a")+j)}' if line_num > 2 else curv_ind
+                    data_dict_curv[curv_ind_j] = {'header': header_curv,
+                                                  'data': {},
+                                                  'units': {'x': header_dict['X axis unit [General Info]'],
+                                                            'y': y_unit
+                                                            }
+                                                } 
+                    for i, curv_dir in enumerate(line_order):
+                        data_dict_curv[curv_ind_j]['data'][curv_dir] = {
+                            'x': x_data[k+i],
+                            'y': y_data[k+i]
+                            }                                                  
             
-            if curv_ind == curv_num:
-                break
-            else:
-                pos += data_len #bytes read so far
-                file.seek(pos, 0)
+                if curv_ind == curv_num:
+                    break
+                else:
+                    pos += data_len #bytes read so far
+                    file.seek(pos, 0)
 
         data_dict[y_label] = {'image': data_dict_chan,
                             'curves': data_dict_curv
                             }
-        file.close()
         
         return data_dict, y_label
 
     # read *.cur WSxM file
     @staticmethod
-    def _wsxm_readcur(filepath):
+    def _wsxm_readcur(filepath, file_data=None):
         """
         Reads WSxM spectroscopy curve (*.cur) files and extracts the data.
         Args:
             filepath (str): The path to the .cur file to be read.
+            file_data (bytes, optional): Contents of the file, if already read. The file is opened otherwise.
         Returns:
             tuple: A tuple containing:
                 - data_dict (dict): A dictionary containing the extracted data.
@@ -676,52 +796,51 @@ class WSxMFuncs():
         """
 
         data_dict = {}
-        file = open(f'{filepath}','rb')
-        header_dict, pos = WSxMFuncs._wsxm_readheader(file)
-        header_dict['File path'] = filepath #file path included to header
-
-        if 'Index of this Curve [Control]' in header_dict.keys(): #for spectroscopy curves
-            line_num = int(header_dict['Number of lines [General Info]'])
-            y_label = header_dict['Y axis text [General Info]'].split('[')[0].strip()
-            x_label = header_dict['X axis text [General Info]'].split('[')[0].strip()
-            if header_dict['Index of this Curve [Control]'] == 'Average': #for average curves
-                curv_ind = header_dict['Index of this Curve [Control]']
-            else:
-                curv_ind = int(header_dict['Index of this Curve [Control]'])
-            curv_num = int(header_dict['Number of Curves in this serie [Control]'])
-            chan_fact = float(header_dict['Conversion Factor 00 [General Info]'].split(' ')[0])
-            y_unit = header_dict['Conversion Factor 00 [General Info]'].split(' ')[-1]
-            chan_inv = header_dict['Channel is inverted [General Info]']
-            if chan_inv == 'Yes':
-                chan_fact = -chan_fact
-            chan_offs = float(header_dict['Conversion Offset 00 [General Info]'].split(' ')[0])
+        with WSxMFuncs._wsxm_open(filepath, file_data) as file:
+            header_dict, pos = WSxMFuncs._wsxm_readheader(file)
+            header_dict['File path'] = filepath #file path included to header
+
+            if 'Index of this Curve [Control]' in header_dict: #for spectroscopy curves
+                line_num = int(header_dict['Number of lines [General Info]'])
+                y_label = header_dict['Y axis text [General Info]'].split('[')[0].strip()
+                x_label = header_dict['X axis text [General Info]'].split('[')[0].strip()
+                if header_dict['Index of this Curve [Control]'] == 'Average': #for average curves
+                    curv_ind = header_dict['Index of this Curve [Control]']
+                else:
+                    curv_ind = int(header_dict['Index of this Curve [Control]'])
+                curv_num = int(header_dict['Number of Curves in this serie [Control]'])
+                chan_fact, y_unit = _header_num_unit(header_dict['Conversion Factor 00 [General Info]'])
+                chan_inv = header_dict['Channel is inverted [General Info]']
+                if chan_inv == 'Yes':
+                    chan_fact = -chan_fact
+                chan_offs = _header_num(header_dict['Conversion Offset 00 [General Info]'])
             
-            line_order = ['approach', 'retract']
-            if header_dict['First Forward [Miscellaneous]'] == 'No': #CHECK THIS
-                line_order = ['retract', 'approach']
-        else: #for other kinds of *.cur (e.g. tune data)
-            line_pts = int(header_dict['Number of points [General Info]'])
-            line_num = int(header_dict['Number of lines [General Info]'])
-            y_label = header_dict['Y axis text [General Info]'].split('[')[0].strip()
-            x_label = header_dict['X axis text [General Info]'].split('[')[0].strip()
-            #set generic values for irrelevant parameters here
-            curv_ind = 1
-            curv_num = 1
-            chan_fact = 1
-            chan_offs = 0  
-            y_unit = header_dict['Y axis unit [General Info]']                         
-            line_order = [f'{y_label}_{ln_i+1}' for ln_i in range(line_num)]
+                line_order = ['approach', 'retract']
+                if header_dict['First Forward [Miscellaneous]'] == 'No': #CHECK THIS
+                    line_order = ['retract', 'approach']
+            else: #for other kinds of *.cur (e.g. tune data)
+                line_pts = int(header_dict['Number of points [General Info]'])
+                line_num = int(header_dict['Number of lines [General Info]'])
+                y_label = header_dict['Y axis text [General Info]'].split('[')[0].strip()
+                x_label = header_dict['X axis text [General Info]'].split('[')[0].strip()
+                #set generic values for irrelevant parameters here
+                curv_ind = 1
+                curv_num = 1
+                chan_fact = 1
+                chan_offs = 0  
+                y_unit = header_dict['Y axis unit [General Info]']                         
+                line_order = [f'{y_label}_{ln_i+1}' for ln_i in range(line_num)]
         
-        header_dict['Spectroscopy channel'] = y_label #Insert channel name information into dictionary
-        file.seek(pos, 0)
-        data = file.read()
-        data_list = []
-        for ln in data.splitlines():
-            ln_array = ln.decode('latin-1', errors='ignore').strip().replace('#QNAN','').split(' ')
-            data_list.append(list(map(float,ln_array)))
-        data_mat = np.array(data_list) #data matrix   
-
-        if y_label not in data_dict.keys():
+            header_dict['Spectroscopy channel'] = y_label #Insert channel name information into dictionary
+            file.seek(pos, 0)
+            data = file.read().replace(b'#QNAN', b'') #e.g. '-1.#QNAN' is read as -1
+
+        data_mat = np.loadtxt(data.splitlines(), dtype=float, comments=None, encoding='latin-1', ndmin=2) #data matrix
+        y_mat = data_mat[:, 1::2] #y columns of all lines, converted to units in place
+        np.multiply(y_mat, chan_fact, out=y_mat)
+        np.add(y_mat, chan_offs, out=y_mat)
+
+        if y_label not in data_dict:
             data_dict[y_label] = {'curves':{}, 'image':{}}
 
         for j in range(int(line_num/len(line_order))):
@@ -736,16 +855,14 @@ class WSxMFuncs():
             for i, curv_dir in enumerate(line_order):
                 data_dict[y_label]['curves'][curv_ind_j]['data'][curv_dir] = {
                     'x': data_mat[:,k+(2*i)],
-                    'y': chan_offs+(data_mat[:,k+(2*i+1)]*chan_fact) #converted to units
+                    'y': data_mat[:,k+(2*i+1)]
                     }
 
-        file.close()
-        
         return data_dict, y_label
 
     #read *.stp spectroscopy curves. Pass "data_dict" to update data of both approach and retract into it correctly
     @staticmethod
-    def _wsxm_readstp(filepath, data_dict={}):
+    def _wsxm_readstp(filepath, data_dict={}, file_data=None):
         """
         Reads a WSxM .stp spectroscopy file and extracts the data into a dictionary.
         Args:
@@ -753,6 +870,7 @@ class WSxMFuncs():
             data_dict (dict, optional): A dictionary to store the extracted data. 
             Use this to combine "approach" and "retract" curve data spread across different files into the same dictionary passed here.
             Defaults to an empty dictionary.
+            file_data (bytes, optional): Contents of the file, if already read. The file is opened otherwise.
         Returns:
             tuple: A tuple containing:
                 - data_dict (dict): The dictionary containing the extracted data.
@@ -775,77 +893,73 @@ class WSxMFuncs():
         }
         """
 
-        file = open(f'{filepath}','rb')
-        filename = filepath.name
-        header_dict, pos = WSxMFuncs._wsxm_readheader(file)
-        header_dict['File path'] = [filepath] #file path included to header
-        data_format = header_dict['Image Data Type [General Info]']
+        with WSxMFuncs._wsxm_open(filepath, file_data) as file:
+            filename = filepath.name
+            header_dict, pos = WSxMFuncs._wsxm_readheader(file)
+            header_dict['File path'] = [filepath] #file path included to header
+            data_format = header_dict['Image Data Type [General Info]']
         
-        x_num = int(header_dict['Number of rows [General Info]'])
-        y_num = int(header_dict['Number of columns [General Info]'])
-        x_len = float(header_dict['X Amplitude [Control]'].split(' ')[0])
-        y_len = float(header_dict['Y Amplitude [Control]'].split(' ')[0])
-        z_len = float(header_dict['Z Amplitude [General Info]'].split(' ')[0])
-        x_dir = header_dict['X scanning direction [General Info]']
-        y_dir = header_dict['Y scanning direction [General Info]']
-        file_dirkey = filename.split('.')[-2]
-        if len(file_dirkey) == 1:
-            chan_label = filename.split('_')[-1].split('.')[0] 
-            z_dir = WSxMFuncs.SPECT_DICT[filename.split('.')[-2]]
-        else:
-            file_dirkey_match = re.search(r'line\_\d{1}', file_dirkey)
-            chan_label = file_dirkey[:file_dirkey_match.start()].split('_')[-1]
-            z_dir = WSxMFuncs.SPECT_DICT[x_dir] 
+            x_num = int(header_dict['Number of rows [General Info]'])
+            y_num = int(header_dict['Number of columns [General Info]'])
+            x_len, x_unit = _header_num_unit(header_dict['X Amplitude [Control]'])
+            y_len, y_unit = _header_num_unit(header_dict['Y Amplitude [Control]'])
+            z_len, z_unit = _header_num_unit(header_dict['Z Amplitude [General Info]'])
+            x_dir = header_dict['X scanning direction [General Info]']
+            y_dir = header_dict['Y scanning direction [General Info]']
+            file_dirkey = filename.split('.')[-2]
+            if len(file_dirkey) == 1:
+                chan_label = filename.split('_')[-1].split('.')[0] 
+                z_dir = WSxMFuncs.SPECT_DICT[file_dirkey]
+            else:
+                file_dirkey_match = re.search(r'line\_\d{1}', file_dirkey)
+                chan_label = file_dirkey[:file_dirkey_match.start()].split('_')[-1]
+                z_dir = WSxMFuncs.SPECT_DICT[x_dir] 
             
-        if 'X starting offset [General Info]' in header_dict.keys(): #for "3D mode" images
-            x_offset = float(header_dict['X starting offset [General Info]'].split(' ')[0])
-            y_offset = float(header_dict['Y starting offset [General Info]'].split(' ')[0])
-        else:
-            x_offset = 0
-            y_offset = 0
+            if 'X starting offset [General Info]' in header_dict: #for "3D mode" images
+                x_offset = _header_num(header_dict['X starting offset [General Info]'])
+                y_offset = _header_num(header_dict['Y starting offset [General Info]'])
+            else:
+                x_offset = 0
+                y_offset = 0
 
-        header_dict['Spectroscopy channel'] = chan_label #Insert channel name information into dictionary
+            header_dict['Spectroscopy channel'] = chan_label #Insert channel name information into dictionary
 
-        z_data = np.linspace(x_offset, x_offset+x_len, y_num, endpoint=True) #CHECK THIS
-        #read binary image data
-        point_length, type_code  = WSxMFuncs.DATA_TYPES[data_format]
-        file.seek(pos, 0)
-        data_len = x_num*y_num*point_length
-        bin_data = file.read(data_len)
-        ch_array = np.array(list(struct.iter_unpack(f'{type_code}', bin_data))).flatten() 
-        ch_mat = ch_array.reshape(x_num,y_num)
-        if z_len == 0: #for zero data
+            z_data = WSxMFuncs._wsxm_axis(x_offset, x_offset+x_len, y_num) #CHECK THIS
+            #read binary image data
+            _, np_dtype = WSxMFuncs.DATA_TYPES[data_format]
+            ch_mat = WSxMFuncs._wsxm_readstack(file, pos, (x_num, y_num), np_dtype)
+
+        z_range = float(ch_mat.max())-float(ch_mat.min()) #avoid integer overflow of raw data
+        if z_len == 0 or z_range == 0: #for zero or constant data
             z_calib = 1
         else:
-            z_calib = z_len/(ch_array.max()-ch_array.min())
+            z_calib = z_len/z_range
+        y_all = np.multiply(ch_mat, z_calib, dtype=np.float64) #all lines calibrated at once
+        if x_dir == 'Forward':
+            y_all = y_all[:, ::-1]
         
         #create separate curve data for each line (consistent with '1D' data format)
+        #data dictionary initialised in a consistant format (also check wsxm_readcurves())
+        curves_chan = data_dict.setdefault(chan_label, {'curves': {}, 'image':{}})['curves']
         for i in range(x_num): 
             curv_ind = i + 1        
-            #data dictionary initialised in a consistant format (also check wsxm_readcurves())
-            if chan_label not in data_dict.keys():
-                data_dict[chan_label] = {'curves': {}, 'image':{}}
-            if curv_ind not in data_dict[chan_label]['curves'].keys():
-                data_dict[chan_label]['curves'][curv_ind] = {'data': {},
-                                                             'header': header_dict.copy(),
-                                                             'units': {'x': header_dict['X Amplitude [Control]'].split(' ')[-1],
-                                                                       'y': header_dict['Z Amplitude [General Info]'].split(' ')[-1]
-                                                                       }
-                                                            }
+            curve = curves_chan.get(curv_ind)
+            if curve is None:
                 #insert curve number info into header
-                data_dict[chan_label]['curves'][curv_ind]['header']['Index of this Curve [Control]'] = str(curv_ind) 
-                data_dict[chan_label]['curves'][curv_ind]['header']['Number of Curves in this serie [Control]'] = str(x_num)
-            if z_dir not in data_dict[chan_label]['curves'][curv_ind]['data'].keys():
-                data_dict[chan_label]['curves'][curv_ind]['data'][z_dir] = {}
-            if filepath not in data_dict[chan_label]['curves'][curv_ind]['header']['File path']: #file path included to header
-                data_dict[chan_label]['curves'][curv_ind]['header']['File path'].append(filepath)
-            data_dict[chan_label]['curves'][curv_ind]['data'][z_dir]['x'] = z_data
-            data_dict[chan_label]['curves'][curv_ind]['data'][z_dir]['y'] = (z_calib*ch_mat[:][i])
-            if x_dir == 'Forward':
-                data_dict[chan_label]['curves'][curv_ind]['data'][z_dir]['y'] = np.flip((z_calib*ch_mat[:][i]))
-
-        file.close()
-        
+                header_curv = header_dict | {'Index of this Curve [Control]': str(curv_ind),
+                                             'Number of Curves in this serie [Control]': str(x_num)}
+                curve = curves_chan[curv_ind] = {'data': {},
+                                                 'header': header_curv,
+                                                 'units': {'x': x_unit,
+                                                           'y': z_unit
+                                                           }
+                                                }
+            elif filepath not in curve['header']['File path']: #curve from another file, file path included to header
+                curve['header']['File path'].append(filepath)
+            curve_dir = curve['data'].setdefault(z_dir, {})
+            curve_dir['x'] = z_data
+            curve_dir['y'] = y_all[i]
+
         return data_dict, chan_label
     
 
@@ -878,74 +992,66 @@ class WSxMFuncs():
         }
         """
 
-        file = open(f'{filepath}','rb')
-        header_dict, pos = WSxMFuncs._wsxm_readheader(file)
-        header_dict['File path'] = filepath #file path included to header
+        with open(filepath, 'rb', buffering=1024*1024) as file:
+            header_dict, pos = WSxMFuncs._wsxm_readheader(file)
+            header_dict['File path'] = filepath #file path included to header
+
+            data_format = header_dict['Image Data Type [General Info]']
+            chan_label = header_dict['Acquisition channel [General Info]']
+            x_num = int(header_dict['Number of rows [General Info]'])
+            y_num = int(header_dict['Number of columns [General Info]'])
+            chan_num = int(header_dict['Number of points per ramp [General Info]'])
+            x_len, x_unit = _header_num_unit(header_dict['X Amplitude [Control]'])
+            y_len, y_unit = _header_num_unit(header_dict['Y Amplitude [Control]'])
+            z_len, z_unit = _header_num_unit(header_dict['Z Amplitude [General Info]'])
+            chan_adc2v = _header_num(header_dict['ADC to V conversion factor [General Info]'])
+            chan_fact, chan_unit = _header_num_unit(header_dict['Conversion factor 0 for input channel [General Info]'])
+            chan_offs = _header_num(header_dict['Conversion offset 0 for input channel [General Info]']) #0
 
-        data_format = header_dict['Image Data Type [General Info]']
-        chan_label = header_dict['Acquisition channel [General Info]']
-        x_num = int(header_dict['Number of rows [General Info]'])
-        y_num = int(header_dict['Number of columns [General Info]'])
-        chan_num = int(header_dict['Number of points per ramp [General Info]'])
-        x_len = float(header_dict['X Amplitude [Control]'].split(' ')[0])
-        y_len = float(header_dict['Y Amplitude [Control]'].split(' ')[0])
-        z_len = float(header_dict['Z Amplitude [General Info]'].split(' ')[0])
-        chan_adc2v = float(header_dict['ADC to V conversion factor [General Info]'].split(' ')[0])
-        chan_fact = float(header_dict['Conversion factor 0 for input channel [General Info]'].split(' ')[0])
-        chan_offs = float(header_dict['Conversion offset 0 for input channel [General Info]'].split(' ')[0]) #0
-
-        chan_inv = header_dict['Channel is inverted [General Info]']
-        if chan_inv == 'Yes':
-            chan_fact = -chan_fact
+            chan_inv = header_dict['Channel is inverted [General Info]']
+            if chan_inv == 'Yes':
+                chan_fact = -chan_fact
                 
-        x_data = np.linspace(0, x_len, x_num, endpoint=True)
-        y_data = np.linspace(y_len, 0, y_num, endpoint=True)
+            x_data = WSxMFuncs._wsxm_axis(0, x_len, x_num)
+            y_data = WSxMFuncs._wsxm_axis(y_len, 0, y_num)
     
-        z_data = np.empty(0)
-        for i in range(chan_num):
-            z_data = np.append(z_data, float(header_dict[f'Image {i:03} [Spectroscopy images ramp value list]'].split(' ')[0]))
+            z_data = np.fromiter((_header_num(header_dict[f'Image {i:03} [Spectroscopy images ramp value list]']) 
+                                  for i in range(chan_num)), dtype=float, count=chan_num)
 
-        z_data = np.flip(z_data) #reverse z data order to make zero as point of contact
+            z_data = z_data[::-1] #reverse z data order to make zero as point of contact
         
-        #read binary image data
-        point_length, type_code  = WSxMFuncs.DATA_TYPES[data_format]
-        file.seek(pos, 0)
-        data_len = x_num*y_num*point_length
-        #read first topography data
-        bin_data = file.read(data_len)
-        topo_array = np.array(list(struct.iter_unpack(f'{type_code}', bin_data))).flatten()
-        if z_len == 0: #for zero data
+            #read binary image data, first topography image followed by the channel images, in a single read
+            _, np_dtype = WSxMFuncs.DATA_TYPES[data_format]
+            raw_all = WSxMFuncs._wsxm_readstack(file, pos, (chan_num+1, y_num, x_num), np_dtype)
+
+        topo_array = raw_all[0]
+        topo_range = float(topo_array.max())-float(topo_array.min()) #avoid integer overflow of raw data
+        if z_len == 0 or topo_range == 0: #for zero or constant data
             topo_calib = 1
         else:
-            topo_calib = z_len/(topo_array.max()-topo_array.min())
-        
-        topo_data = topo_calib*topo_array.reshape(x_num, y_num) #topography data
+            topo_calib = z_len/topo_range
+    
+        topo_data = np.multiply(topo_array.reshape(x_num, y_num), topo_calib, dtype=np.float64) #topography data
 
-        pos += data_len
-        ch_array = np.empty(0) #initialize channel data array
-        for i in range(1, chan_num+1):
-            file.seek(pos, 0)
-            bin_data = file.read(data_len)
-            ch_array_temp = np.array(list(struct.iter_unpack(f'{type_code}', bin_data))).flatten()
-            ch_array = np.append(ch_array, chan_offs+(ch_array_temp*chan_adc2v*chan_fact))
-            pos += data_len #next image
+        raw_array = raw_all[1:]
+        #float32 is ample for the 16 bit ADC data and halves the size of the stack
+        ch_array = _calibrate_stack(raw_array, chan_adc2v*chan_fact, chan_offs,
+                                    np.empty(raw_array.shape, dtype=np.float32))
             
         #img data dictionary
-        data_dict_chan = {'data': {'ZZ': ch_array.reshape(chan_num,y_num,x_num),#,
+        data_dict_chan = {'data': {'ZZ': ch_array,
                                 'X': x_data,
                                 'Y': y_data,
                                 'Z': z_data
                                 },
                         'header': header_dict,
-                        'units': {'ZZ': header_dict['Conversion factor 0 for input channel [General Info]'].split(' ')[-1],
-                                    'X': header_dict['X Amplitude [Control]'].split(' ')[-1],
-                                    'Y': header_dict['Y Amplitude [Control]'].split(' ')[-1],
-                                    'Z': header_dict['Z Amplitude [General Info]'].split(' ')[-1],
+                        'units': {'ZZ': chan_unit,
+                                    'X': x_unit,
+                                    'Y': y_unit,
+                                    'Z': z_unit,
                                     }
                         }
         
-        file.close()
-        
         return data_dict_chan, chan_label, topo_data
 
     def _wsxm_readmovie(filepath):
@@ -976,63 +1082,83 @@ class WSxMFuncs():
         }
         """
 
-        file = open(f'{filepath}','rb')
-        header_dict, pos = WSxMFuncs._wsxm_readheader(file)
-        header_dict['File path'] = filepath #file path included to header
-
-        data_format = header_dict['Image Data Type [General Info]']
-        chan_label = header_dict['Acquisition channel [General Info]']
-        x_num = int(header_dict['Number of rows [General Info]'])
-        y_num = int(header_dict['Number of columns [General Info]'])
-        chan_num = int(header_dict['Number of Frames [General Info]'])
-        x_len = float(header_dict['X Amplitude [Control]'].split(' ')[0])
-        y_len = float(header_dict['Y Amplitude [Control]'].split(' ')[0])
-        z_len = float(header_dict['Z Amplitude [General Info]'].split(' ')[0])
-        z_min = float(header_dict['Minimum [Miscellaneous]'])
-        z_max = float(header_dict['Maximum [Miscellaneous]'])
+        with open(filepath, 'rb', buffering=1024*1024) as file:
+            header_dict, pos = WSxMFuncs._wsxm_readheader(file)
+            header_dict['File path'] = filepath #file path included to header
+
+            data_format = header_dict['Image Data Type [General Info]']
+            chan_label = header_dict['Acquisition channel [General Info]']
+            x_num = int(header_dict['Number of rows [General Info]'])
+            y_num = int(header_dict['Number of columns [General Info]'])
+            chan_num = int(header_dict['Number of Frames [General Info]'])
+            x_len, x_unit = _header_num_unit(header_dict['X Amplitude [Control]'])
+            y_len, y_unit = _header_num_unit(header_dict['Y Amplitude [Control]'])
+            z_len, z_unit = _header_num_unit(header_dict['Z Amplitude [General Info]'])
+            z_min = float(header_dict['Minimum [Miscellaneous]'])
+            z_max = float(header_dict['Maximum [Miscellaneous]'])
                 
-        x_data = np.linspace(0, x_len, x_num, endpoint=True)
-        y_data = np.linspace(y_len, 0, y_num, endpoint=True)
-        z_data = np.linspace(0, chan_num, chan_num, endpoint=True) #frame number array
+            x_data = WSxMFuncs._wsxm_axis(0, x_len, x_num)
+            y_data = WSxMFuncs._wsxm_axis(y_len, 0, y_num)
+            z_data = WSxMFuncs._wsxm_axis(0, chan_num, chan_num) #frame number array
 
-        #read binary image data
-        point_length, type_code  = WSxMFuncs.DATA_TYPES[data_format]
-        data_len = x_num*y_num*point_length
+            #read binary image data
+            point_length, np_dtype = WSxMFuncs.DATA_TYPES[data_format]
+            data_len = x_num*y_num*point_length
 
-        if z_len == 0: #for zero data
-            z_calib = 1
-        else:
-            z_calib = z_len/(z_max-z_min)
+            if z_len == 0: #for zero data
+                z_calib = 1
+            else:
+                z_calib = z_len/(z_max-z_min)
         
-        z_unit = header_dict['Z Amplitude [General Info]'].split(' ')[-1]
-        #the following fixes a bug in the data format for amplitude channel, ensures that data is read in volts, not nanometers (which is fake)
-        if chan_label == 'Amplitude' and header_dict['Z Amplitude [General Info]'].split(' ')[1] != 'V':
-            chan_factor = float(header_dict['Conversion Factor 00 [General Info]'].split(' ')[0])
-            z_calib = z_calib/chan_factor
-            z_unit = 'V'
+            #the following fixes a bug in the data format for amplitude channel, ensures that data is read in volts, not nanometers (which is fake)
+            if chan_label == 'Amplitude' and header_dict['Z Amplitude [General Info]'].split(' ')[1] != 'V':
+                chan_factor = _header_num(header_dict['Conversion Factor 00 [General Info]'])
+                z_calib = z_calib/chan_factor
+                z_unit = 'V'
 
-        ch_array = np.empty(0) #initialize channel data array
-        for i in range(1, chan_num+1):
-            file.seek(pos, 0)
-            bin_data = file.read(data_len)
-            ch_array_temp = np.array(list(struct.iter_unpack(f'{type_code}', bin_data))).flatten()          
-            ch_array = np.append(ch_array, z_calib*ch_array_temp)
-            pos += data_len #next image
+            raw_array = WSxMFuncs._wsxm_readstack(file, pos, (chan_num, y_num, x_num), np_dtype)
+
+        #float32 as for force volume data, ample for the 16 bit height data of movies
+        ch_array = _calibrate_stack(raw_array, z_calib, 0.0, np.empty(raw_array.shape, dtype=np.float32))
             
         #img data dictionary
-        data_dict_chan = {'data': {'ZZ': ch_array.reshape(chan_num,y_num,x_num),#,
+        data_dict_chan = {'data': {'ZZ': ch_array,
                                 'X': x_data,
                                 'Y': y_data,
                                 'Z': z_data
                                 },
                         'header': header_dict,
                         'units': {'ZZ': z_unit,
-                                    'X': header_dict['X Amplitude [Control]'].split(' ')[-1],
-                                    'Y': header_dict['Y Amplitude [Control]'].split(' ')[-1],
+                                    'X': x_unit,
+                                    'Y': y_unit,
                                     'Z': 'frame',
                                     }
                         }
         
-        file.close()
-        
         return data_dict_chan, chan_label
+
+
+@njit(parallel=True, cache=True)
+def _calibrate_stack(raw_array, scale, offset, ch_array):
+    # converts the raw image stack to physical units in a single pass, in parallel over images.
+    # the result is written to ch_array, whose dtype sets the output precision
+    for i in prange(raw_array.shape[0]):
+        for j in range(raw_array.shape[1]):
+            for k in range(raw_array.shape[2]):
+                ch_array[i, j, k] = offset + raw_array[i, j, k]*scale
+    return ch_array
+
+
+def _header_num(value):
+    # numeric part of a header value like '12.5 nm'
+    return float(value.partition(' ')[0])
+
+
+def _header_unit(value):
+    # unit part of a header value like '12.5 nm' (last word)
+    return value.rpartition(' ')[2]
+
+
+def _header_num_unit(value):
+    # numeric and unit part of a header value like '12.5 nm'
+    return _header_num(value), _header_unit(value)
@@ -1,5 +1,8 @@
 
 import pytest
+import numpy as np
+import mrcfile
+from mrcfile.dtypes import get_ext_header_dtype
 import sidpy
 import SciFiReaders as sr
 from pywget import wget
@@ -53,4 +56,95 @@ def test_data_shape(download_mrc_file):
     reader.read()
 
     assert reader.data is not None, "Data should not be None."
-    assert len(reader.data.shape) == 4, "Expected a 4D dataset."
\ No newline at end of file
+    assert len(reader.data.shape) == 4, "Expected a 4D dataset."
+
+
+def _write_scan_mrc(file_path, scan_shape, num_frames, frame_shape=(8, 6)):
+    """Write a small .mrc file with an FEI extended header describing a scan of scan_shape."""
+    ext_dtype = get_ext_header_dtype(b'FEI1')
+    data = np.arange(num_frames * frame_shape[0] * frame_shape[1], dtype=np.float32)
+    data = data.reshape(num_frames, *frame_shape)
+    with mrcfile.new(file_path, overwrite=True) as mrc:
+        mrc.set_data(data)
+        extended_header = np.zeros(num_frames, dtype=ext_dtype)
+        extended_header['Metadata size'] = ext_dtype.itemsize
+        extended_header['Scan size right'] = scan_shape[1]
+        extended_header['Scan size bottom'] = scan_shape[0]
+        extended_header['Pixel size X'] = 2e9
+        extended_header['Pixel size Y'] = 2e9
+        mrc.set_extended_header(extended_header)
+        mrc.header.exttyp = b'FEI1'
+    return data
+
+
+def test_lazy_read(tmp_path):
+    """A lazy read skips the extended header until read_metadata() is called."""
+    file_path = str(tmp_path / "square_scan.mrc")
+    data = _write_scan_mrc(file_path, (4, 4), 16)
+
+    reader = sr.MRCReader(file_path)
+    dataset = reader.read(lazy=True)["Channel_000"]
+
+    assert dataset.shape == (4, 4, 8, 6), "Lazy read should assume a square scan."
+    assert reader.metadata is None, "Lazy read should not touch the extended header."
+    assert (dataset.compute().reshape(data.shape) == data).all(), "Data changed on a lazy read."
+
+    metadata = reader.read_metadata()
+    assert dataset.original_metadata is metadata, "read_metadata should fill the dataset metadata."
+    assert metadata['Scan size right'][0] == 4
+
+    reader.close()
+
+
+def test_truncated_scan(tmp_path):
+    """A scan stopped early is zero-filled, with the recorded frames at their raster positions."""
+    file_path = str(tmp_path / "truncated_scan.mrc")
+    data = _write_scan_mrc(file_path, (3, 5), 11)
+
+    reader = sr.MRCReader(file_path)
+    dataset = reader.read()["Channel_000"]
+    assert dataset.shape == (3, 5, 8, 6), "Truncated scan should keep the full scan shape."
+
+    values = np.asarray(dataset.compute())
+    recorded = np.zeros((3, 5), dtype=bool)
+    for k in range(11):
+        x, y = divmod(k, 5)
+        recorded[x, y] = True
+        assert (values[x, y] == data[k]).all(), f"Frame {k} is not at scan position {(x, y)}."
+    assert recorded.sum() == 11
+    assert (values[~recorded] == 0).all(), "Missing frames should be filled with zeros."
+
+    reader.close()
+
+
+def test_too_many_frames(tmp_path):
+    """More frames than scan positions is an error, not a truncated scan."""
+    file_path = str(tmp_path / "too_many_frames.mrc")
+    _write_scan_mrc(file_path, (3, 5), 16)
+
+    reader = sr.MRCReader(file_path)
+    with pytest.raises(ValueError):
+        reader.read()
+    reader.close()
+
+
+def test_repeated_read(tmp_path):
+    """A second read() closes the previous memory map and read_metadata() leaves older datasets alone."""
+    file_path = str(tmp_path / "repeated_read.mrc")
+    data = _write_scan_mrc(file_path, (4, 4), 16)
+
+    reader = sr.MRCReader(file_path)
+    lazy_dataset = reader.read(lazy=True)["Channel_000"]
+    first_mrc = reader._mrc_file
+    dataset = reader.read()["Channel_000"]
+
+    assert first_mrc.header is None, "read() should close the memory map of the previous read."
+    reader.read_metadata()
+    assert lazy_dataset.original_metadata == {}, "read_metadata should not touch a dataset of an earlier read."
+    assert (np.asarray(lazy_dataset.compute()).reshape(data.shape) == data).all()
+    assert (np.asarray(dataset.compute()).reshape(data.shape) == data).all()
+
+    reader.read(lazy=True)
+    assert reader.metadata is None, "A lazy read should not keep the metadata of an earlier read."
+
+    reader.close()
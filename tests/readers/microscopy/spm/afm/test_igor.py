@@ -1444,3 +1444,16 @@ class TestIgorIBW(unittest.TestCase):
             "should have descriptor {} but instead has descriptor {}".format(ind, data_descriptors[ind], datasets[key].data_descriptor)
         
         os.remove(file_path)
+
+
+def test_parse_parm_line_types():
+    from SciFiReaders.readers.microscopy.spm.afm.igor_ibw import _parse_parm_line
+    parm_dict = {}
+    for line in ['ScanLines: 256', 'ScanRate: 1.5', 'Offset: NaN', 'Limit: inf', 'ImagingMode: AC Mode', 'a: b: c']:
+        _parse_parm_line(line, parm_dict)
+    assert parm_dict['ScanLines'] == 256 and type(parm_dict['ScanLines']) is int
+    assert parm_dict['ScanRate'] == 1.5
+    assert parm_dict['Offset'] == 'NaN', "NaN note values should be kept as text"
+    assert parm_dict['Limit'] == float('inf')
+    assert parm_dict['ImagingMode'] == 'AC Mode'
+    assert 'a' not in parm_dict, "Lines with several separators hold no key-value pair"
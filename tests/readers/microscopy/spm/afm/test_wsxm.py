@@ -1,6 +1,10 @@
 import unittest
 import sys
 import os
+import io
+import tempfile
+from pathlib import Path
+import numpy as np
 import sidpy
 from pywget import wget
 from matplotlib import pyplot as plt
@@ -11,6 +15,7 @@ if __name__ == '__main__':
     sys.path.append("../SciFiReaders/")
 
 import SciFiReaders as sr
+from SciFiReaders.readers.microscopy.spm.afm.wsxm import WSxMFuncs, WSxM1DReader
 
 
 root_path = "https://github.com/pycroscopy/SciFiDatasets/blob/main/data/microscopy/spm/afm/wsxm/"
@@ -125,6 +130,290 @@ class TestWSxM(unittest.TestCase):
         plt.show()
         print("WSxM 3D data plotted successfully\n")
 
+
+def wsxm_header(sections):
+    """Builds the bytes of a WSxM text header from a list of (section title, {name: value}) pairs."""
+    body = ''
+    for title, entries in sections:
+        body += '\r\n[{}]\r\n\r\n'.format(title)
+        for name, value in entries.items():
+            body += '    {}: {}\r\n'.format(name, value)
+    body += '\r\n[Header end]\r\n'
+    pre = 'WSxM file copyright UAM\r\nSxM Image file\r\nImage header size: {:05d}\r\n'
+    size = len(pre.format(0)) + len(body)
+    return (pre.format(size) + body).encode('latin-1')
+
+
+def image_sections(chan, x_num, y_num, data_type='short', **general):
+    """Header sections of a WSxM image with a 'Z Amplitude' of 12.5 nm over raw values from -1000 to 3000."""
+    general_info = {'Acquisition channel': chan, 'Image Data Type': data_type,
+                    'Number of rows': x_num, 'Number of columns': y_num,
+                    'Z Amplitude': '12.5 nm', 'X scanning direction': 'Forward'}
+    general_info.update(general)
+    return [('Control', {'X Amplitude': '500 nm', 'Y Amplitude': '400 nm'}),
+            ('General Info', general_info),
+            ('Miscellaneous', {'Minimum': '-1000', 'Maximum': '3000'})]
+
+
+class TestWSxMFuncs(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path_dir = Path(temp_dir.name)
+        self.rng = np.random.default_rng(0)
+
+    def write_file(self, name, *blocks):
+        file_path = self.path_dir / name
+        file_path.write_bytes(b''.join(blocks))
+        return file_path
+
+    def test_readimg_float_data_is_float64(self):
+        # float-data images must be calibrated in double precision, not kept as float32
+        raw = np.linspace(-1, 3, 12, dtype='<f4')
+        header_dict = {'Image Data Type [General Info]': 'float-data',
+                       'Acquisition channel [General Info]': 'Topography',
+                       'Number of rows [General Info]': '3',
+                       'Number of columns [General Info]': '4',
+                       'X Amplitude [Control]': '500 nm',
+                       'Y Amplitude [Control]': '400 nm',
+                       'Z Amplitude [General Info]': '12.5 nm',
+                       'Minimum [Miscellaneous]': '-1',
+                       'Maximum [Miscellaneous]': '3'}
+        data_dict_chan, pos = WSxMFuncs._wsxm_readimg(io.BytesIO(raw.tobytes()), header_dict, 0)
+        z_data = data_dict_chan['data']['Z']
+        assert z_data.dtype == np.float64, "Image data should be float64 but is {}".format(z_data.dtype)
+        assert z_data.shape == (3, 4), "Image data should be of shape (3, 4) but is {}".format(z_data.shape)
+        assert np.allclose(z_data, 12.5/4*raw.astype(np.float64).reshape(3, 4))
+        assert pos == raw.nbytes, "Position should be {} but is {}".format(raw.nbytes, pos)
+
+    def test_readheader(self):
+        # header keys get their section title appended, values are stripped
+        header = wsxm_header(image_sections('Topography', 3, 4))
+        file = io.BytesIO(header + b'data')
+        header_dict, pos = WSxMFuncs._wsxm_readheader(file)
+        assert pos == len(header), "Header should end at {} but ends at {}".format(len(header), pos)
+        assert header_dict['Acquisition channel [General Info]'] == 'Topography'
+        assert header_dict['X Amplitude [Control]'] == '500 nm'
+        assert header_dict['Number of columns [General Info]'] == '4'
+
+        # repeated headers come from the cache, but every caller gets its own dictionary
+        header_dict['Acquisition channel [General Info]'] = 'changed'
+        hits = WSxMFuncs._wsxm_parseheader.cache_info().hits
+        header_dict_2, _ = WSxMFuncs._wsxm_readheader(io.BytesIO(header))
+        assert WSxMFuncs._wsxm_parseheader.cache_info().hits == hits + 1
+        assert header_dict_2['Acquisition channel [General Info]'] == 'Topography'
+
+    def test_readheader_larger_than_inibyte(self):
+        # headers longer than the first read are completed with a second read
+        entries = {'Entry {:04}'.format(i): '{} nm'.format(i) for i in range(300)}
+        header = wsxm_header(image_sections('Topography', 3, 4) + [('Long section', entries)])
+        assert len(header) > 4096
+        header_dict, pos = WSxMFuncs._wsxm_readheader(io.BytesIO(header + b'data'), pos=0)
+        assert pos == len(header)
+        assert header_dict['Entry 0299 [Long section]'] == '299 nm'
+
+        # header read at an offset, as for the curves in *.curves files
+        header_dict, pos = WSxMFuncs._wsxm_readheader(io.BytesIO(b'12345' + header), pos=5)
+        assert pos == 5 + len(header)
+        assert header_dict['Entry 0000 [Long section]'] == '0 nm'
+
+    def test_readcurves(self):
+        top_raw = self.rng.integers(-1000, 3000, 9).astype('<i2')
+        blocks = [wsxm_header(image_sections('Topography', 3, 3)), top_raw.tobytes()]
+        curves_raw = []
+        for curv_ind, first_forward in ((1, 'Yes'), (2, 'No')):
+            general_info = {'Number of points': 5, 'Number of lines': 2,
+                            'Y axis text': 'Normal force [nN]', 'X axis text': 'Z [nm]',
+                            'X axis unit': 'nm', 'Conversion Factor 00': '1.5 nN',
+                            'Conversion Offset 00': '0.2 nN', 'Channel is inverted': 'Yes'}
+            control = {'Index of this Curve': curv_ind, 'Number of Curves in this serie': 2}
+            raw = self.rng.integers(-500, 500, (2, 5, 2)).astype('<i2')
+            blocks += [wsxm_header([('Control', control), ('General Info', general_info),
+                                    ('Miscellaneous', {'First Forward': first_forward})]), raw.tobytes()]
+            curves_raw.append(raw)
+        file_path = self.write_file('fz_0001.curves', *blocks)
+
+        data_dict, y_label = WSxMFuncs._wsxm_readcurves(file_path)
+        assert y_label == 'Normal force'
+        assert np.allclose(data_dict[y_label]['image']['data']['Z'], 12.5/4000*top_raw.reshape(3, 3))
+        curves = data_dict[y_label]['curves']
+        assert sorted(curves.keys()) == [1, 2]
+        for curv_ind, line_order in ((1, ['approach', 'retract']), (2, ['retract', 'approach'])):
+            raw = curves_raw[curv_ind-1]
+            assert curves[curv_ind]['units'] == {'x': 'nm', 'y': 'nN'}
+            assert curves[curv_ind]['header']['Index of this Curve [Control]'] == str(curv_ind)
+            assert curves[curv_ind]['header']['Acquisition channel [General Info]'] == 'Topography'
+            for line, curv_dir in enumerate(line_order):
+                x_data = curves[curv_ind]['data'][curv_dir]['x']
+                y_data = curves[curv_ind]['data'][curv_dir]['y']
+                assert x_data.dtype == np.float64 and y_data.dtype == np.float64
+                assert np.array_equal(x_data, raw[line, :, 0])
+                assert np.allclose(y_data, 0.2 - 1.5*raw[line, :, 1])
+
+    def test_readcur(self):
+        general_info = {'Number of lines': 2, 'Number of points': 3,
+                        'Y axis text': 'Normal force [nN]', 'X axis text': 'Z [nm]',
+                        'X axis unit': 'nm', 'Conversion Factor 00': '2 nN',
+                        'Conversion Offset 00': '0.5 nN', 'Channel is inverted': 'No'}
+        header = wsxm_header([('Control', {'Index of this Curve': 3, 'Number of Curves in this serie': 4}),
+                              ('General Info', general_info),
+                              ('Miscellaneous', {'First Forward': 'Yes'})])
+        rows = b'0 1 10 -1.#QNAN\r\n1 2 11 5\r\n2 3 12 6\r\n' #'-1.#QNAN' is read as -1
+        file_path = self.write_file('fz_0001_3.cur', header, rows)
+
+        data_dict, y_label = WSxMFuncs._wsxm_readcur(file_path)
+        curve = data_dict[y_label]['curves'][3]
+        assert np.array_equal(curve['data']['approach']['x'], [0, 1, 2])
+        assert np.allclose(curve['data']['approach']['y'], [2.5, 4.5, 6.5])
+        assert np.array_equal(curve['data']['retract']['x'], [10, 11, 12])
+        assert np.allclose(curve['data']['retract']['y'], [-1.5, 10.5, 12.5])
+        assert curve['units'] == {'x': 'nm', 'y': 'nN'}
+
+        # the same curve read from contents already in memory
+        data_dict_2, _ = WSxMFuncs._wsxm_readcur(file_path, file_path.read_bytes())
+        assert np.array_equal(data_dict_2[y_label]['curves'][3]['data']['retract']['y'],
+                              curve['data']['retract']['y'])
+
+    def test_readstp_merges_directions(self):
+        raw_all = {}
+        for key, x_dir in (('f', 'Forward'), ('b', 'Backward')):
+            raw = self.rng.integers(-1000, 1000, (4, 6)).astype('<i2')
+            sections = image_sections('Normal force', 4, 6, **{'X scanning direction': x_dir,
+                                                                'Y scanning direction': 'Up'})
+            self.write_file('s3d_0005_Normal.{}.stp'.format(key), wsxm_header(sections), raw.tobytes())
+            raw_all[key] = raw
+
+        data_dict = {}
+        for key in ('f', 'b'):
+            data_dict, chan_label = WSxMFuncs._wsxm_readstp(self.path_dir / 's3d_0005_Normal.{}.stp'.format(key),
+                                                             data_dict)
+        assert chan_label == 'Normal'
+        curves = data_dict[chan_label]['curves']
+        assert sorted(curves.keys()) == [1, 2, 3, 4]
+        for curv_ind, curve in curves.items():
+            assert type(curve['header']) is dict, "Curve headers should be plain dictionaries"
+            assert curve['header']['Index of this Curve [Control]'] == str(curv_ind)
+            assert curve['header']['Number of Curves in this serie [Control]'] == '4'
+            assert [path_i.name for path_i in curve['header']['File path']] == ['s3d_0005_Normal.f.stp',
+                                                                               's3d_0005_Normal.b.stp']
+            assert np.allclose(curve['data']['approach']['x'], np.linspace(0, 500, 6))
+            for curv_dir, key in (('approach', 'f'), ('retract', 'b')):
+                raw = raw_all[key].astype(np.float64)
+                z_calib = 12.5/(raw.max()-raw.min())
+                expected = z_calib*raw[curv_ind-1]
+                if key == 'f': #forward lines are reversed
+                    expected = expected[::-1]
+                y_data = curve['data'][curv_dir]['y']
+                assert y_data.dtype == np.float64
+                assert np.allclose(y_data, expected)
+
+    def test_readstp_constant_data(self):
+        # a flat channel has no range to scale to, it is read unscaled instead of failing
+        sections = image_sections('Normal force', 2, 3, **{'Y scanning direction': 'Up'})
+        file_path = self.write_file('flat_0006_Normal.b.stp', wsxm_header(sections),
+                                    np.full((2, 3), 7, dtype='<i2').tobytes())
+        data_dict, chan_label = WSxMFuncs._wsxm_readstp(file_path, {})
+        assert np.array_equal(data_dict[chan_label]['curves'][1]['data']['retract']['y'], [7, 7, 7])
+
+    def write_forcevol(self, name, raw, x_num, y_num, chan_num):
+        general_info = {'Acquisition channel': 'Normal force', 'Image Data Type': 'short',
+                        'Number of rows': x_num, 'Number of columns': y_num,
+                        'Number of points per ramp': chan_num, 'Z Amplitude': '30 nm',
+                        'ADC to V conversion factor': '0.5 V', 'Conversion factor 0 for input channel': '3 nN',
+                        'Conversion offset 0 for input channel': '0.25 nN', 'Channel is inverted': 'Yes',
+                        'Spectroscopy type': 'Z Forward'}
+        ramp = {'Image {:03}'.format(i): '{:.2f} nm'.format(i*1.5) for i in range(chan_num)}
+        sections = [('Control', {'X Amplitude': '500 nm', 'Y Amplitude': '400 nm'}),
+                    ('General Info', general_info), ('Spectroscopy images ramp value list', ramp)]
+        return self.write_file(name, wsxm_header(sections), raw.tobytes())
+
+    def test_readforcevol(self):
+        x_num, y_num, chan_num = 5, 7, 6
+        raw = self.rng.integers(-3000, 3000, (chan_num+1, y_num, x_num)).astype('<i2')
+        file_path = self.write_forcevol('fv_0003.gsi', raw, x_num, y_num, chan_num)
+
+        data_dict_chan, chan_label, topo_data = WSxMFuncs._wsxm_readforcevol(file_path)
+        assert chan_label == 'Normal force'
+        topo_raw = raw[0].astype(np.float64)
+        assert topo_data.dtype == np.float64
+        assert np.allclose(topo_data, 30/(topo_raw.max()-topo_raw.min())*topo_raw.reshape(x_num, y_num))
+        zz_data = data_dict_chan['data']['ZZ']
+        assert zz_data.dtype == np.float32 and zz_data.shape == (chan_num, y_num, x_num)
+        assert np.allclose(zz_data, 0.25 - 0.5*3*raw[1:], rtol=1e-6)
+        assert np.allclose(data_dict_chan['data']['Z'], np.arange(chan_num)[::-1]*1.5)
+        assert data_dict_chan['units']['ZZ'] == 'nN'
+
+    def test_readforcevol_constant_topography(self):
+        raw = np.ones((3, 2, 2), dtype='<i2')
+        file_path = self.write_forcevol('fv_0004.gsi', raw, 2, 2, 2)
+        _, _, topo_data = WSxMFuncs._wsxm_readforcevol(file_path)
+        assert np.array_equal(topo_data, np.ones((2, 2)))
+
+    def test_3d_reader_orientation(self):
+        # the dataset is the stack rotated to the measurement orientation
+        x_num = y_num = 4
+        raw = self.rng.integers(-3000, 3000, (4, y_num, x_num)).astype('<i2')
+        file_path = self.write_forcevol('fv_0005.gsi', raw, x_num, y_num, 3)
+        datasets = sr.WSxM3DReader(str(file_path)).read()
+        assert list(datasets.keys()) == ['Channel_000']
+        zz_data = (0.25 - 0.5*3*raw[1:]).astype(np.float32)
+        expected = np.flip(np.rot90(zz_data, k=1, axes=(2, 1)), axis=1)
+        assert np.allclose(np.asarray(datasets['Channel_000']), expected, rtol=1e-6)
+
+    def test_readmovie(self):
+        x_num, y_num, frame_num = 5, 7, 4
+        raw = self.rng.integers(-1000, 3000, (frame_num, y_num, x_num)).astype('<i2')
+        sections = image_sections('Topography', x_num, y_num, **{'Number of Frames': frame_num})
+        file_path = self.write_file('mov_0002.MOV', wsxm_header(sections), raw.tobytes())
+
+        data_dict_chan, chan_label = WSxMFuncs._wsxm_readmovie(file_path)
+        assert chan_label == 'Topography'
+        zz_data = data_dict_chan['data']['ZZ']
+        assert zz_data.dtype == np.float32 and zz_data.shape == (frame_num, y_num, x_num)
+        assert np.allclose(zz_data, 12.5/4000*raw, rtol=1e-6)
+        assert np.array_equal(data_dict_chan['data']['Z'], np.linspace(0, frame_num, frame_num))
+
+    def test_readstack_short_read(self):
+        with self.assertRaises(ValueError):
+            WSxMFuncs._wsxm_readstack(io.BytesIO(bytes(10)), 2, (2, 3), '<i2')
+
+    def test_get_common_files(self):
+        for name in ('scan_0007.top', 'scan_0007.ch1', 'scan_0007_2.cur', 'scan_0008.top'):
+            self.write_file(name, b'')
+        (self.path_dir / 'scan_0007_dir').mkdir()
+        file_path = self.path_dir / 'scan_0007.ch1'
+
+        filepath_all = WSxMFuncs._wsxm_get_common_files(file_path)
+        assert filepath_all[0] == file_path, "The chosen file should come first"
+        assert sorted(path_i.name for path_i in filepath_all[1:]) == ['scan_0007.top', 'scan_0007_2.cur']
+        assert WSxMFuncs._wsxm_get_common_files(file_path, ext='.top') == [file_path, self.path_dir / 'scan_0007.top']
+        assert WSxMFuncs._wsxm_get_common_files(self.path_dir / 'noindex.top') == [self.path_dir / 'noindex.top']
+
+        # files added later are found straight away
+        self.write_file('scan_0007.ch2', b'')
+        filepath_all = WSxMFuncs._wsxm_get_common_files(file_path)
+        assert 'scan_0007.ch2' in [path_i.name for path_i in filepath_all]
+
+    def test_prefetch_files(self):
+        class CountedFile:
+            started = 0
+            def __init__(self, name):
+                self.name = name
+            def read_bytes(self):
+                CountedFile.started += 1
+                return self.name.encode()
+
+        paths = [CountedFile('file_{}'.format(i)) for i in range(7)]
+        prefetch = WSxM1DReader._prefetch_files(paths, window=2)
+        path_first, data_first = next(prefetch)
+        assert path_first is paths[0] and data_first == b'file_0'
+        assert CountedFile.started <= 3, "At most the window plus one file should be read ahead"
+        rest = list(prefetch)
+        assert [path_i for path_i, _ in rest] == paths[1:], "Files should be yielded in order"
+        assert all(data == path_i.name.encode() for path_i, data in rest)
+
+
 if __name__ == '__main__': 
     #Since we don't have the files yet, I am disabling the tests    
     print('Skipping tests for wsxm reader')